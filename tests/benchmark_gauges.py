@@ -0,0 +1,66 @@
+"""Time GaugeIndex lookups against scanning the CNRFCGauges selector options
+
+Run with python tests/benchmark_gauges.py
+"""
+import time
+from tethysdash_plugin_cnrfc.constants import CNRFCGauges
+from tethysdash_plugin_cnrfc.gauges import GaugeIndex
+
+SEARCH_TEXT = "american"
+
+
+def timed(function, repeat=200):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+
+    return best, result
+
+
+def scan_label(gauge):
+    for group in CNRFCGauges:
+        for option in group["options"]:
+            if option["value"] == gauge:
+                return option["label"]
+
+
+def scan_search(text):
+    text = text.lower()
+    found = []
+    for group in CNRFCGauges:
+        for option in group["options"]:
+            gauge = option["value"]
+            if text in option["label"].lower() and gauge not in found:
+                found.append(gauge)
+
+    return found
+
+
+def main():
+    options = sum(len(group["options"]) for group in CNRFCGauges)
+    build_time, gauge_index = timed(GaugeIndex, repeat=20)
+    last_gauge = gauge_index.gauges[-1]
+
+    print(f"{options} options, {len(gauge_index)} gauges")
+    print(f"build index          {build_time * 1000:8.3f} ms")
+    scan_time, scanned = timed(lambda: scan_label(last_gauge))
+    index_time, indexed = timed(lambda: gauge_index.label(last_gauge))
+    print(f"label of last, scan  {scan_time * 1e6:8.2f} us")
+    print(f"label of last, index {index_time * 1e6:8.2f} us")
+    print("identical", scanned == indexed)
+    scan_time, scanned = timed(lambda: [scan_label(g) for g in gauge_index], 5)
+    index_time, indexed = timed(lambda: [gauge_index.label(g) for g in gauge_index])
+    print(f"every label, scan    {scan_time * 1000:8.3f} ms")
+    print(f"every label, index   {index_time * 1000:8.3f} ms")
+    print("identical", scanned == indexed)
+    scan_time, scanned = timed(lambda: scan_search(SEARCH_TEXT))
+    index_time, indexed = timed(lambda: gauge_index.search(SEARCH_TEXT))
+    print(f"search {SEARCH_TEXT!r}, scan   {scan_time * 1e6:8.2f} us")
+    print(f"search {SEARCH_TEXT!r}, index  {index_time * 1e6:8.2f} us")
+    print("same gauges", sorted(scanned) == sorted(indexed))
+
+
+if __name__ == "__main__":
+    main()
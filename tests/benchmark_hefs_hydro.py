@@ -0,0 +1,82 @@
+"""Time the river forecast and forcing traces of a HEFS chart
+
+Compares the per point date conversion and list of every date the traces used to
+build with the bulk datetime64 conversion, and times get_hydro_data and
+get_forcing_data on pages with a long observed history. The per point dates are
+written in UTC here so they can be compared; they used to be in server time.
+Run with python tests/benchmark_hefs_hydro.py
+"""
+import contextlib
+import io
+import time
+from datetime import datetime, timezone
+import numpy as np
+from conftest import rvf_page
+from tethysdash_plugin_cnrfc.hefs import HEFS
+from tethysdash_plugin_cnrfc.rvf import parse_rvf_payload, scan_rvf_page
+
+OBSERVED_HOURS = (2_000, 10_000, 20_000)
+
+
+def timed(function, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+
+    return best, result
+
+
+def per_point_dates(points):
+    dates = []
+    all_dates = []
+    for point in points:
+        date = datetime.fromtimestamp(point["x"] / 1000, timezone.utc)
+        dates.append(date.strftime("%Y-%m-%dT%H:%M"))
+        if date not in all_dates:
+            all_dates.append(date)
+    all_dates.sort()
+
+    return dates
+
+
+def bulk_dates(points):
+    milliseconds = np.array([point["x"] for point in points], dtype=np.int64)
+    return np.datetime_as_string(
+        milliseconds.astype("datetime64[ms]"), unit="m"
+    ).tolist()
+
+
+def build_traces(payloads):
+    source = HEFS("CREC1", True)
+    # the range the HEFS traces set before the river forecast traces are added
+    source.range_ymin, source.range_ymax = 0, 40
+    with contextlib.redirect_stdout(io.StringIO()):
+        source.get_hydro_data(payloads["series"])
+        source.get_forcing_data(payloads["forcing"])
+
+    return source.plot_series
+
+
+def main():
+    for observed_hours in OBSERVED_HOURS:
+        payloads = {
+            name: [parse_rvf_payload(payload) for payload in found]
+            for name, found in scan_rvf_page(rvf_page(observed_hours)).items()
+        }
+        observed = payloads["series"][0]["data"]
+        per_point_time, per_point = timed(lambda: per_point_dates(observed), 1)
+        bulk_time, bulk = timed(lambda: bulk_dates(observed))
+        traces_time, traces = timed(lambda: build_traces(payloads))
+
+        print(f"{observed_hours} observed points")
+        print(f"per point dates  {per_point_time * 1000:8.1f} ms")
+        print(f"datetime64 dates {bulk_time * 1000:8.1f} ms")
+        print("identical", per_point == bulk)
+        print(f"hydro + forcing  {traces_time * 1000:8.1f} ms")
+        print("observed trace matches", traces[0]["x"] == bulk)
+
+
+if __name__ == "__main__":
+    main()
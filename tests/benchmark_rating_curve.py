@@ -0,0 +1,58 @@
+"""Time the scalar and array rating curve conversions of a HEFS ensemble matrix
+
+Run with python tests/benchmark_rating_curve.py
+"""
+import time
+import numpy as np
+from tethysdash_plugin_cnrfc.rating_curves import RatingCurve
+from tethysdash_plugin_cnrfc.utilities import (
+    interpolate_stage_from_rating_curve,
+    interpolate_stages_from_rating_curve,
+)
+
+ROWS = 700
+MEMBERS = 50
+TABLE_SIZE = 400
+
+
+def timed(function, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+
+    return best, result
+
+
+def main():
+    rng = np.random.default_rng(0)
+    stages = list(np.round(np.cumsum(rng.uniform(0.01, 0.1, TABLE_SIZE)), 2))
+    flows = list(np.round(np.cumsum(rng.uniform(1, 500, TABLE_SIZE)), 1))
+    ensembles = rng.uniform(0, flows[-1] * 1.2, (ROWS, MEMBERS))
+    curve = RatingCurve(stages, flows)
+
+    def scalar_conversion():
+        return np.array(
+            [
+                [interpolate_stage_from_rating_curve(stages, flows, x) for x in row]
+                for row in ensembles
+            ]
+        )
+
+    scalar_time, scalar = timed(scalar_conversion, repeat=1)
+    array_time, array = timed(
+        lambda: interpolate_stages_from_rating_curve(stages, flows, ensembles)
+    )
+    curve_time, from_curve = timed(lambda: curve.stage_from_flow(ensembles))
+
+    print(f"{ROWS}x{MEMBERS} matrix, {TABLE_SIZE} point table")
+    print(f"scalar       {scalar_time * 1000:8.1f} ms")
+    print(f"array        {array_time * 1000:8.1f} ms")
+    print(f"RatingCurve  {curve_time * 1000:8.1f} ms")
+    identical = np.array_equal(scalar, array) and np.array_equal(array, from_curve)
+    print("identical", identical)
+
+
+if __name__ == "__main__":
+    main()
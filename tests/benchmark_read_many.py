@@ -0,0 +1,52 @@
+"""Time HEFS.read_many against reading the same gauges one after another
+
+Upstream latency is simulated by FakeCNRFC. Run with python tests/benchmark_read_many.py
+"""
+import os
+import tempfile
+import time
+from conftest import FakeCNRFC
+from tethysdash_plugin_cnrfc.gauges import get_gauge_index
+from tethysdash_plugin_cnrfc.hefs import HEFS
+from tethysdash_plugin_cnrfc.http_client import HTTPClient, set_client
+from tethysdash_plugin_cnrfc.memo import ensemble_cache, figure_cache
+from tethysdash_plugin_cnrfc.rating_curves import clear_rating_curve_cache
+
+BASIN_GROUP = "North Coast"
+# seconds every simulated upstream response takes
+LATENCY = 0.1
+
+
+def clear_caches():
+    figure_cache.clear()
+    ensemble_cache.clear()
+    clear_rating_curve_cache()
+
+
+def timed(function):
+    clear_caches()
+    start = time.perf_counter()
+    result = function()
+
+    return time.perf_counter() - start, result
+
+
+def main():
+    gauges = get_gauge_index().gauges_in_group(BASIN_GROUP)
+    set_client(HTTPClient(transport=FakeCNRFC(delay=LATENCY), cache=None))
+
+    sequential_time, sequential = timed(
+        lambda: {gauge: HEFS(gauge).read() for gauge in gauges}
+    )
+    batch_time, batch = timed(lambda: HEFS.read_many([BASIN_GROUP]))
+
+    print(f"{len(gauges)} gauges, {LATENCY * 1000:.0f} ms per upstream response")
+    print(f"sequential  {sequential_time * 1000:8.1f} ms")
+    print(f"read_many   {batch_time * 1000:8.1f} ms")
+    print("identical", sequential == batch)
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as cache_dir:
+        os.environ["TETHYSDASH_CNRFC_CACHE_DIR"] = cache_dir
+        main()
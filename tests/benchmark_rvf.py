@@ -0,0 +1,69 @@
+"""Time scanning and parsing a graphicalRVF page against one findall per call and hjson
+
+Run with python tests/benchmark_rvf.py
+"""
+import re
+import time
+import hjson
+from conftest import rvf_page
+from tethysdash_plugin_cnrfc.rvf import iter_rvf_data, parse_rvf_payload, scan_rvf_page
+
+OBSERVED_HOURS = (2_000, 20_000)
+CHUNK_SIZE = 64 * 1024
+# the patterns each plot used to search the page with
+HJSON_PATTERNS = {
+    "series": r"chart\.addSeries\((.*),false\);",
+    "thresholds": r"chart\.yAxis\[0\]\.addPlotLine\((.*)\);",
+    "forcing": r"chart2\.addSeries\((.*),false\);",
+}
+
+
+def timed(function, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+
+    return best, result
+
+
+def parse_with_hjson(page):
+    return {
+        name: [hjson.loads(payload) for payload in re.findall(pattern, page)]
+        for name, pattern in HJSON_PATTERNS.items()
+    }
+
+
+def parse_scanned(page):
+    return {
+        name: [parse_rvf_payload(payload) for payload in payloads]
+        for name, payloads in scan_rvf_page(page).items()
+    }
+
+
+def parse_streamed(page):
+    parsed = {name: [] for name in HJSON_PATTERNS}
+    chunks = (page[start:][:CHUNK_SIZE] for start in range(0, len(page), CHUNK_SIZE))
+    for name, payload in iter_rvf_data(chunks):
+        parsed[name].append(payload)
+
+    return parsed
+
+
+def main():
+    for observed_hours in OBSERVED_HOURS:
+        page = rvf_page(observed_hours)
+        hjson_time, from_hjson = timed(lambda: parse_with_hjson(page), repeat=1)
+        scanned_time, scanned = timed(lambda: parse_scanned(page))
+        streamed_time, streamed = timed(lambda: parse_streamed(page))
+
+        print(f"{observed_hours} observed points, {len(page) / 1e6:.2f} MB")
+        print(f"findall + hjson  {hjson_time * 1000:8.1f} ms")
+        print(f"scan + json      {scanned_time * 1000:8.1f} ms")
+        print(f"streamed         {streamed_time * 1000:8.1f} ms")
+        print("identical", from_hjson == scanned == streamed)
+
+
+if __name__ == "__main__":
+    main()
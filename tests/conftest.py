@@ -0,0 +1,197 @@
+import hashlib
+import io
+import json
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from urllib.parse import urlparse
+import numpy as np
+import pytest
+import requests
+from requests.adapters import BaseAdapter
+from tethysdash_plugin_cnrfc import gauge_manifest
+from tethysdash_plugin_cnrfc.http_client import HTTPClient
+from tethysdash_plugin_cnrfc.memo import ensemble_cache, figure_cache
+from tethysdash_plugin_cnrfc.rating_curves import clear_rating_curve_cache
+
+ISSUANCE_TIME = datetime(2024, 1, 10, 12)
+LAST_MODIFIED = "Wed, 10 Jan 2024 12:00:00 GMT"
+
+
+def epoch_ms(date):
+    return int(date.replace(tzinfo=timezone.utc).timestamp() * 1000)
+
+
+def rating_js():
+    stages = np.linspace(2, 40, 100).round(2)
+    flows = np.geomspace(20, 250000, 100).round()
+    lines = ["var ratingFlow = [];", "var ratingStage = [];"]
+    for flow, stage in zip(flows, stages):
+        lines.append(f"ratingFlow.push({flow});")
+        lines.append(f"ratingStage.push({stage});")
+
+    return "\n".join(lines) + "\n"
+
+
+def hefs_csv(unit, rows=240, members=10):
+    rng = np.random.default_rng(0)
+    base = np.cumsum(rng.normal(0, 0.3, rows)) + 20
+    lines = [
+        "GMT," + ",".join(["CREC1"] * members),
+        "," + ",".join([unit] * members),
+    ]
+    for row in range(rows):
+        date = (ISSUANCE_TIME + timedelta(hours=row)).strftime("%Y-%m-%d %H:%M:%S")
+        values = np.abs(base[row] + rng.normal(0, 2, members)).round(2)
+        lines.append(date + "," + ",".join(str(value) for value in values))
+
+    return "\n".join(lines) + "\n"
+
+
+def hefs_page():
+    return (
+        "<html><body>"
+        + "<p>filler</p>\n" * 200
+        + "<table><tr><td class='x'>Issuance Time: </td>"
+        + "<td>Jan 10 2024 12:00 UTC</td></tr></table>"
+        + "</body></html>"
+    )
+
+
+def rvf_page(observed_hours=200):
+    def points(hours, stage):
+        return ",".join(
+            f"{{x:{epoch_ms(ISSUANCE_TIME + timedelta(hours=hour))},"
+            f"y:{round(stage + np.sin(hour / 7), 2)},flow:{1000 + hour}}}"
+            for hour in hours
+        )
+
+    def forcing(hours):
+        return ",".join(
+            f"[{epoch_ms(ISSUANCE_TIME + timedelta(hours=hour))}, "
+            f"'{round(abs(np.sin(hour)), 2)}']"
+            for hour in hours
+        )
+
+    lines = [
+        "<html><script>",
+        "chart.addSeries({name: 'Observed', color: '#ff66ff', data: ["
+        + points(range(-observed_hours, 0), 18)
+        + "]},false);",
+        "chart.addSeries({name: 'Forecast', data: ["
+        + points(range(0, 240, 6), 19)
+        + "]},false);",
+        "chart.yAxis[0].addPlotLine({value: 25, color: 'orange', width: 2, "
+        "label: {text: 'Monitor Stage', align: 'right'}});",
+        "chart.yAxis[0].addPlotLine({value: 31.5, color: 'red', width: 2, "
+        "label: {text: 'Flood Stage'}});",
+        "chart2.addSeries({name: 'Observed Rain + Melt', data: ["
+        + forcing(range(-48, 0, 6))
+        + "]},false);",
+        "chart2.addSeries({name: 'Forecast Rain + Melt', data: ["
+        + forcing(range(0, 144, 6))
+        + "]},false);",
+        "</script></html>",
+    ]
+
+    return "\n".join(lines)
+
+
+class FakeCNRFC(BaseAdapter):
+    """A requests transport serving made up CNRFC and NWPS responses
+
+    Every response is held back by delay seconds, or by the delay of the first
+    entry of delays whose text is part of the url, and every request is counted
+    by url path. With validators, responses carry an ETag and a Last-Modified
+    header and a request whose If-None-Match matches is answered with 304.
+    """
+
+    def __init__(
+        self, delay=0, delays=None, csv_variant="sstg", rating=True, validators=False
+    ):
+        super(FakeCNRFC, self).__init__()
+        self.delay = delay
+        self.delays = delays or {}
+        self.csv_variant = csv_variant
+        self.rating = rating
+        self.validators = validators
+        self.requests = []
+        self.not_modified = 0
+        self.lock = threading.Lock()
+
+    def body(self, url):
+        parsed = urlparse(url)
+        path = parsed.path
+        if path.endswith("_rating.js"):
+            return rating_js() if self.rating else None
+        if path.endswith("_hefs_csv_hourly_sstg.csv"):
+            return hefs_csv("FT") if self.csv_variant == "sstg" else None
+        if path.endswith("_hefs_csv_hourly.csv"):
+            return hefs_csv("KCFS") if self.csv_variant == "hourly" else None
+        if path == "/ensembleProduct.php":
+            return hefs_page()
+        if path == "/graphicalRVF_printer.php":
+            return rvf_page()
+        if path.startswith("/nwps/v1/gauges/"):
+            return json.dumps({"flood": {"impacts": [{"stage": 1, "statement": "x"}]}})
+
+        return None
+
+    def send(self, request, stream=False, timeout=None, **kwargs):
+        with self.lock:
+            self.requests.append((request.method, urlparse(request.url).path))
+        delay = next(
+            (seconds for text, seconds in self.delays.items() if text in request.url),
+            self.delay,
+        )
+        time.sleep(delay)
+
+        body = self.body(request.url)
+        response = requests.Response()
+        response.request = request
+        response.url = request.url
+        response.status_code = 404 if body is None else 200
+        response.encoding = "utf-8"
+        content = b"" if body is None or request.method == "HEAD" else body.encode()
+        if self.validators and body is not None:
+            etag = f'"{hashlib.sha256(body.encode()).hexdigest()[:16]}"'
+            response.headers["ETag"] = etag
+            response.headers["Last-Modified"] = LAST_MODIFIED
+            if request.headers.get("If-None-Match") == etag:
+                response.status_code = 304
+                content = b""
+                with self.lock:
+                    self.not_modified += 1
+        response.raw = io.BytesIO(content)
+
+        return response
+
+    def close(self):
+        pass
+
+
+@pytest.fixture(autouse=True)
+def isolated_caches(tmp_path, monkeypatch):
+    """Give every test its own cache directory and empty in-process caches"""
+    monkeypatch.setenv("TETHYSDASH_CNRFC_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(gauge_manifest, "_manifest", None)
+    monkeypatch.setattr(figure_cache, "max_bytes", figure_cache.max_bytes)
+    figure_cache.clear()
+    ensemble_cache.clear()
+    clear_rating_curve_cache()
+    yield
+    figure_cache.clear()
+    ensemble_cache.clear()
+    clear_rating_curve_cache()
+
+
+@pytest.fixture
+def fake_cnrfc():
+    return FakeCNRFC()
+
+
+@pytest.fixture
+def fake_client(fake_cnrfc):
+    client = HTTPClient(transport=fake_cnrfc, cache=None)
+    yield client
+    client.close()
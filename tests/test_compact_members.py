@@ -0,0 +1,55 @@
+import base64
+from datetime import timedelta
+import numpy as np
+import pytest
+from tethysdash_plugin_cnrfc.hefs import compact_ensemble_member_series
+from conftest import ISSUANCE_TIME, epoch_ms
+
+
+def decode(typed_array):
+    dtype = np.dtype(typed_array["dtype"]).newbyteorder("<")
+    return np.frombuffer(base64.b64decode(typed_array["bdata"]), dtype=dtype)
+
+
+@pytest.fixture
+def members():
+    dates = [
+        (ISSUANCE_TIME + timedelta(hours=hour)).strftime("%Y-%m-%d %H:%M:%S")
+        for hour in range(4)
+    ]
+    ensembles = np.arange(12, dtype=float).reshape(4, 3)
+    ensembles[2, 1] = np.nan
+    milliseconds = [
+        epoch_ms(ISSUANCE_TIME + timedelta(hours=hour)) for hour in range(4)
+    ]
+
+    return dates, ensembles, milliseconds
+
+
+def test_compact_members_are_separated_by_gaps(members):
+    dates, ensembles, milliseconds = members
+    trace = compact_ensemble_member_series(dates, ensembles)
+
+    assert len(trace["x"]) == len(trace["y"]) == 3 * 5
+    for member in range(3):
+        start = member * 5
+        assert trace["x"][start:][:4] == milliseconds
+        assert trace["x"][start + 4] is None
+        assert trace["y"][start + 4] is None
+        np.testing.assert_array_equal(trace["y"][start:][:4], ensembles[:, member])
+    assert np.isnan(trace["y"][5 + 2])
+
+
+def test_binary_compact_members_match_the_plain_trace(members):
+    dates, ensembles, milliseconds = members
+    plain = compact_ensemble_member_series(dates, ensembles)
+    binary = compact_ensemble_member_series(dates, ensembles, binary=True)
+
+    x = decode(binary["x"])
+    y = decode(binary["y"])
+    as_float = [np.nan if value is None else value for value in plain["x"]]
+    np.testing.assert_array_equal(x, as_float)
+    as_float = [np.nan if value is None else value for value in plain["y"]]
+    np.testing.assert_array_equal(y, np.array(as_float, dtype="f4"))
+    assert np.isnan(x[4::5]).all()
+    assert np.isnan(y[4::5]).all()
@@ -0,0 +1,113 @@
+import numpy as np
+import pytest
+from tethysdash_plugin_cnrfc.hefs import HEFS
+from tethysdash_plugin_cnrfc.utilities import decimation_indices
+
+
+def buckets_of(size, max_points, keep=0):
+    """Split the points after keep into the buckets decimation_indices uses"""
+    buckets = max((max_points - 2) // 2, 1)
+    bucket_size = -(-(size - keep) // buckets)
+    return [
+        np.arange(start, min(start + bucket_size, size))
+        for start in range(keep, size, bucket_size)
+    ]
+
+
+@pytest.mark.parametrize("size,max_points", [(1000, 50), (997, 50), (240, 7)])
+def test_every_bucket_keeps_its_minimum_and_maximum(size, max_points):
+    rng = np.random.default_rng(size)
+    lower = rng.normal(0, 1, size)
+    upper = lower + rng.uniform(0, 1, size)
+    indices = decimation_indices(lower, upper, max_points)
+
+    assert indices[0] == 0
+    assert indices[-1] == size - 1
+    assert np.all(np.diff(indices) > 0)
+    assert len(indices) <= max_points
+    for bucket in buckets_of(size, max_points):
+        assert bucket[lower[bucket].argmin()] in indices
+        assert bucket[upper[bucket].argmax()] in indices
+
+
+def test_short_series_are_kept_whole():
+    assert list(decimation_indices(range(10), range(10), 10)) == list(range(10))
+    assert list(decimation_indices(range(12), range(12), 10, keep=5)) == list(
+        range(12)
+    )
+
+
+def test_keep_window_is_kept_whole():
+    values = np.sin(np.arange(500) / 10)
+    indices = decimation_indices(values, values, 20, keep=100)
+
+    assert list(indices[:100]) == list(range(100))
+    assert len(indices) <= 100 + 20
+    for bucket in buckets_of(500, 20, keep=100):
+        assert bucket[values[bucket].argmin()] in indices
+        assert bucket[values[bucket].argmax()] in indices
+
+
+def test_keep_longer_than_the_series_keeps_everything():
+    assert list(decimation_indices(range(30), range(30), 4, keep=50)) == list(
+        range(30)
+    )
+
+
+def test_last_bucket_padding_is_never_picked():
+    # 101 points in 10 buckets of 11 leave 9 padding slots in the last bucket
+    values = np.zeros(101)
+    values[-1] = 5
+    values[-2] = -5
+    indices = decimation_indices(values, values, 22)
+
+    assert indices.max() == 100
+    assert {99, 100} <= set(indices)
+
+
+def test_missing_values_are_never_picked_as_extremes():
+    # without the gaps the first bucket's maximum would be 19 and the second
+    # bucket's minimum 20
+    values = np.arange(100, dtype=float)
+    values[10:25] = np.nan
+    indices = decimation_indices(values, values, 12)
+
+    assert not set(range(10, 25)) & set(indices)
+    assert {0, 9, 25, 39} <= set(indices)
+
+
+def test_all_missing_bucket_keeps_a_point():
+    values = np.full(100, np.nan)
+    indices = decimation_indices(values, values, 12)
+
+    assert indices[0] == 0
+    assert indices[-1] == 99
+
+
+def test_a_single_point_keeps_the_ends_and_extremes():
+    values = np.array([3.0, 9.0, -4.0, 1.0, 2.0, 0.0])
+    indices = decimation_indices(values, values, 1)
+
+    assert list(indices) == [0, 1, 2, 5]
+
+
+def test_max_points_bands_share_one_x_set(fake_client):
+    full = HEFS("CREC1")
+    full.http_client = fake_client
+    full_figure = full.read()
+    source = HEFS("CREC1", max_points=50)
+    source.http_client = fake_client
+    figure = source.read()
+
+    traces = {trace["name"]: trace for trace in figure["data"]}
+    dates = traces["Minimum"]["x"]
+    assert len(dates) < len(full_figure["data"][0]["x"]) // 2
+    for trace in figure["data"]:
+        if trace.get("fill") == "toself":
+            assert trace["x"] == dates + dates[::-1]
+        elif trace["name"].endswith(("Percentile", "Mean", "Minimum", "Maximum")):
+            assert trace["x"] == dates
+
+    full_traces = {trace["name"]: trace for trace in full_figure["data"]}
+    assert min(traces["Minimum"]["y"]) == min(full_traces["Minimum"]["y"])
+    assert max(traces["Maximum"]["y"]) == max(full_traces["Maximum"]["y"])
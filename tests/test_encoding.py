@@ -0,0 +1,63 @@
+import base64
+from datetime import timedelta
+import numpy as np
+import pytest
+from tethysdash_plugin_cnrfc.hefs import HEFS
+from tethysdash_plugin_cnrfc.utilities import encode_typed_array
+from conftest import ISSUANCE_TIME, epoch_ms
+
+
+def decode(typed_array):
+    dtype = np.dtype(typed_array["dtype"]).newbyteorder("<")
+    return np.frombuffer(base64.b64decode(typed_array["bdata"]), dtype=dtype)
+
+
+@pytest.mark.parametrize("dtype", ["f4", "f8", "i4"])
+def test_typed_arrays_round_trip_little_endian(dtype):
+    values = np.array([0, 1.5, -2.25, 1e6, 3]).astype(dtype)
+    encoded = encode_typed_array(values, dtype)
+
+    assert encoded["dtype"] == dtype
+    np.testing.assert_array_equal(decode(encoded), values)
+
+
+def test_big_endian_values_are_encoded_little_endian():
+    values = np.array([1.0, -2.5, np.nan], dtype=">f8")
+    encoded = encode_typed_array(values, "f8")
+
+    assert base64.b64decode(encoded["bdata"]) == values.astype("<f8").tobytes()
+    np.testing.assert_array_equal(decode(encoded), values)
+
+
+def test_lists_are_encoded():
+    np.testing.assert_array_equal(
+        decode(encode_typed_array([1, 2, 3], "f4")), np.array([1, 2, 3], "f4")
+    )
+
+
+def read_traces(fake_client, **kwargs):
+    source = HEFS("CREC1", **kwargs)
+    source.http_client = fake_client
+    return {trace["name"]: trace for trace in source.read()["data"]}
+
+
+def test_binary_dates_are_the_csv_utc_epoch_milliseconds(fake_client):
+    traces = read_traces(fake_client, binary_dates=True)
+
+    milliseconds = decode(traces["Minimum"]["x"])
+    expected = [
+        epoch_ms(ISSUANCE_TIME + timedelta(hours=hour))
+        for hour in range(len(milliseconds))
+    ]
+    np.testing.assert_array_equal(milliseconds, expected)
+
+
+def test_binary_arrays_hold_the_plain_values(fake_client):
+    plain = read_traces(fake_client)
+    binary = read_traces(fake_client, binary_arrays=True)
+
+    for name in ("Minimum", "25% Percentile", "Ensemble Mean"):
+        assert binary[name]["x"] == plain[name]["x"]
+        np.testing.assert_array_equal(
+            decode(binary[name]["y"]), np.array(plain[name]["y"], dtype="f4")
+        )
@@ -0,0 +1,96 @@
+import numpy as np
+import pandas as pd
+import pytest
+from tethysdash_plugin_cnrfc.rating_curves import RatingCurve
+from tethysdash_plugin_cnrfc.utilities import ensemble_statistics
+
+MEMBERS = 41
+# percentiles that fall exactly on an order statistic of MEMBERS members
+ORDER_STATISTIC_PERCENTILES = (0, 0.05, 0.25, 0.5, 0.75, 0.95, 1)
+
+
+def random_curve(rng):
+    size = int(rng.integers(3, 300))
+    stages = np.cumsum(rng.uniform(0.01, 2, size)).round(2)
+    flows = np.cumsum(rng.uniform(0.5, 5000, size)).round(1)
+    return RatingCurve(stages, flows)
+
+
+def in_table_members(rng, table, rows=48):
+    """Members inside the table, with some landing exactly on table entries"""
+    members = rng.uniform(table[0], table[-1], (rows, MEMBERS))
+    hits = rng.random(members.shape) < 0.1
+    members[hits] = rng.choice(table, int(hits.sum()))
+    return members
+
+
+def conversion(curve, direction):
+    """Return the conversion and the table column its inputs come from"""
+    if direction == "stage_from_flow":
+        return curve.stage_from_flow, curve.flows
+    return curve.flow_from_stage, curve.stages
+
+
+directions = pytest.mark.parametrize(
+    "direction", ["stage_from_flow", "flow_from_stage"]
+)
+
+
+@directions
+@pytest.mark.parametrize("seed", range(50))
+def test_sorting_commutes_with_conversion_inside_the_table(seed, direction):
+    rng = np.random.default_rng(seed)
+    convert, table = conversion(random_curve(rng), direction)
+    members = in_table_members(rng, table)
+
+    np.testing.assert_array_equal(
+        np.sort(convert(members), axis=1),
+        convert(np.sort(members, axis=1)),
+    )
+
+
+@directions
+@pytest.mark.parametrize("seed", range(50))
+def test_order_statistics_commute_with_conversion_inside_the_table(seed, direction):
+    rng = np.random.default_rng(seed)
+    convert, table = conversion(random_curve(rng), direction)
+    members = in_table_members(rng, table)
+
+    converted_stats = convert(
+        ensemble_statistics(members, ORDER_STATISTIC_PERCENTILES)[:, :-1]
+    )
+    stats_of_converted = ensemble_statistics(
+        convert(members), ORDER_STATISTIC_PERCENTILES
+    )[:, :-1]
+    np.testing.assert_array_equal(converted_stats, stats_of_converted)
+
+
+@pytest.mark.parametrize("members", [10, 40, 41, 42, 60])
+def test_statistics_match_the_pandas_ones(members):
+    rng = np.random.default_rng(members)
+    ensembles = rng.gamma(2, 3000, (300, members))
+    ensembles[5] = 1234.5
+    percentiles = sorted({0.01, 0.1, 0.33, 0.5, 0.9} | set(ORDER_STATISTIC_PERCENTILES))
+    stats = ensemble_statistics(ensembles, percentiles)
+
+    frame = pd.DataFrame(ensembles.T)
+    quantiles = frame.quantile(percentiles).T.to_numpy()
+    mean = frame.mean().to_numpy()
+    np.testing.assert_allclose(stats[:, :-1], quantiles, rtol=1e-15, atol=0)
+    # the members are summed in another order, so the last digit may differ
+    np.testing.assert_allclose(stats[:, -1], mean, rtol=4e-16, atol=0)
+
+
+def test_statistics_with_missing_members_match_the_pandas_ones():
+    rng = np.random.default_rng(1)
+    ensembles = rng.gamma(2, 3000, (50, MEMBERS))
+    ensembles[rng.random(ensembles.shape) < 0.05] = np.nan
+    stats = ensemble_statistics(ensembles, ORDER_STATISTIC_PERCENTILES)
+
+    frame = pd.DataFrame(ensembles.T)
+    np.testing.assert_allclose(
+        stats[:, :-1],
+        frame.quantile(list(ORDER_STATISTIC_PERCENTILES)).T.to_numpy(),
+        rtol=1e-15,
+    )
+    np.testing.assert_allclose(stats[:, -1], frame.mean().to_numpy(), rtol=4e-16)
@@ -0,0 +1,100 @@
+import pytest
+from tethysdash_plugin_cnrfc.gauge_manifest import (
+    MANIFEST_MISSING_MAX_AGE,
+    get_manifest,
+)
+from tethysdash_plugin_cnrfc.hefs import HEFS
+from tethysdash_plugin_cnrfc.http_client import HTTPClient
+from tethysdash_plugin_cnrfc.memo import ensemble_cache, figure_cache
+from conftest import FakeCNRFC
+
+
+def read_hefs(client, gauge_location="CREC1"):
+    source = HEFS(gauge_location, False)
+    source.http_client = client
+    return source.read()
+
+
+def test_reads_do_not_refresh_the_whole_manifest(fake_cnrfc, fake_client):
+    read_hefs(fake_client)
+
+    manifest = get_manifest()
+    assert manifest.refresh_thread is None
+    assert not [method for method, _ in fake_cnrfc.requests if method == "HEAD"]
+    assert manifest.get("CREC1") == {"hefs_csv": "sstg", "rating_curve": True}
+
+
+def test_refresh_probes_through_the_given_client(fake_cnrfc, fake_client):
+    manifest = get_manifest(refresh=True, client=fake_client)
+    manifest.refresh_thread.join(60)
+
+    assert manifest.get("CREC1") == {"hefs_csv": "sstg", "rating_curve": True}
+    assert {method for method, _ in fake_cnrfc.requests} == {"HEAD"}
+
+
+def test_hourly_gauges_skip_the_sstg_csv_once_known():
+    fake_cnrfc = FakeCNRFC(csv_variant="hourly")
+    client = HTTPClient(transport=fake_cnrfc, cache=None)
+    read_hefs(client)
+    fake_cnrfc.requests.clear()
+    ensemble_cache.clear()
+    figure_cache.clear()
+
+    read_hefs(client)
+
+    paths = [path for _, path in fake_cnrfc.requests]
+    assert "/csv/CREC1_hefs_csv_hourly.csv" in paths
+    assert "/csv/CREC1_hefs_csv_hourly_sstg.csv" not in paths
+
+
+def test_gauges_without_a_rating_table_raise_a_clear_error():
+    client = HTTPClient(transport=FakeCNRFC(rating=False), cache=None)
+    with pytest.raises(ValueError, match="CREC1 has no rating table"):
+        read_hefs(client)
+
+
+def test_gauges_recorded_without_a_rating_table_are_not_fetched(
+    fake_cnrfc, fake_client
+):
+    get_manifest().record("CREC1", rating_curve=False)
+    with pytest.raises(ValueError, match="CREC1 has no rating table"):
+        read_hefs(fake_client)
+
+    paths = [path for _, path in fake_cnrfc.requests]
+    assert "/data/ratings/CREC1_rating.js" not in paths
+
+
+def test_missing_rating_tables_are_checked_again_once_expired(
+    fake_cnrfc, fake_client
+):
+    manifest = get_manifest()
+    manifest.record("CREC1", rating_curve=False)
+    manifest.gauges["CREC1"]["checked"] -= MANIFEST_MISSING_MAX_AGE + 1
+
+    read_hefs(fake_client)
+
+    assert "/data/ratings/CREC1_rating.js" in [path for _, path in fake_cnrfc.requests]
+    assert manifest.get("CREC1")["rating_curve"] is True
+
+
+def test_missing_rating_tables_without_a_check_time_are_checked_again(fake_client):
+    manifest = get_manifest()
+    manifest.gauges["CREC1"] = {"hefs_csv": "sstg", "rating_curve": False}
+
+    read_hefs(fake_client)
+
+    assert manifest.get("CREC1")["rating_curve"] is True
+
+
+def test_manifest_is_kept_in_memory_when_it_can_not_be_saved(
+    tmp_path, monkeypatch, fake_client
+):
+    not_a_directory = tmp_path / "file"
+    not_a_directory.write_text("")
+    monkeypatch.setenv("TETHYSDASH_CNRFC_CACHE_DIR", str(not_a_directory / "cache"))
+
+    read_hefs(fake_client)
+
+    manifest = get_manifest()
+    assert manifest.path is None
+    assert manifest.get("CREC1") == {"hefs_csv": "sstg", "rating_curve": True}
@@ -0,0 +1,184 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+import pytest
+from tethysdash_plugin_cnrfc.constants import CNRFCGauges
+from tethysdash_plugin_cnrfc.gauges import (
+    GaugeIndex,
+    get_gauge_index,
+    get_gauge_option_set,
+)
+
+ROOT = Path(__file__).resolve().parents[1]
+GAUGE_DRIVERS = (
+    "tethysdash_plugin_cnrfc.hefs:HEFS",
+    "tethysdash_plugin_cnrfc.hefs_members:HEFSMembers",
+    "tethysdash_plugin_cnrfc.impact_statements:ImpactStatements",
+    "tethysdash_plugin_cnrfc.ten_day_streamflow_volume_accumulation:StreamflowVolumeAccumulation",  # noqa: E501
+    "tethysdash_plugin_cnrfc.five_day_streamflow_volume_exceedance:VolumeExceedance",
+    "tethysdash_plugin_cnrfc.monthly_streamflow_volume_exceedance:StreamflowVolumeExceedance",  # noqa: E501
+)
+
+# a small selector with labels that end and start with the same words, a repeated
+# id and an option without a value
+GROUPS = [
+    {
+        "label": "North",
+        "options": [
+            {"value": "ABC1", "label": "ABC1 - RIVER - FOO"},
+            {"value": "AB1", "label": "AB1 - CREEK - BAR"},
+            {"value": "ABD1", "label": "ABD1 - FOO RIVER - FOO"},
+        ],
+    },
+    {
+        "label": "South",
+        "options": [
+            {"value": "ACX1", "label": "ACX1 - BAR - FOOD"},
+            {"value": "ABC1", "label": "ABC1 - RIVER - FOO AGAIN"},
+            {"value": "", "label": "NO VALUE"},
+            {"value": "B1", "label": "B1 - LAST - END"},
+        ],
+    },
+]
+
+
+def catalog_arguments(gauge_argument):
+    """Return the visualization_args of the gauge drivers in a fresh process"""
+    code = "import importlib, json\nprint(json.dumps([\n" + "".join(
+        f"    importlib.import_module({module!r}).{name}.visualization_args,\n"
+        for module, name in (driver.split(":") for driver in GAUGE_DRIVERS)
+    ) + "]))"
+    env = dict(os.environ)
+    env.pop("TETHYSDASH_CNRFC_GAUGE_ARGUMENT", None)
+    if gauge_argument:
+        env["TETHYSDASH_CNRFC_GAUGE_ARGUMENT"] = gauge_argument
+    output = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+
+    return json.loads(output)
+
+
+def test_gauge_arguments_are_the_options_by_default():
+    for arguments in catalog_arguments(None):
+        assert arguments["gauge_location"] == CNRFCGauges
+
+
+def test_gauge_arguments_refer_to_the_option_set():
+    option_set = get_gauge_option_set()
+    reference = {"option_set": option_set["name"], "hash": option_set["hash"]}
+
+    arguments = catalog_arguments("option_set")
+    assert all(argument["gauge_location"] == reference for argument in arguments)
+    assert option_set["options"] == CNRFCGauges
+    assert len(json.dumps(arguments)) * 10 < len(json.dumps(catalog_arguments(None)))
+
+
+def test_options_hash_follows_the_options():
+    changed = json.loads(json.dumps(CNRFCGauges))
+    changed[0]["options"][0]["label"] += " (moved)"
+
+    options_hash = get_gauge_index().options_hash
+    assert GaugeIndex().options_hash == options_hash
+    assert GaugeIndex(changed).options_hash != options_hash
+
+
+def test_duplicates_keep_their_first_listing():
+    gauge_index = GaugeIndex(GROUPS)
+
+    assert gauge_index.gauges == ("ABC1", "AB1", "ABD1", "ACX1", "B1")
+    assert gauge_index.label("ABC1") == "ABC1 - RIVER - FOO"
+    assert gauge_index.group("ABC1") == "North"
+    assert gauge_index.position("ABC1") == (0, 0)
+    assert gauge_index.gauges_in_group("South") == ("ACX1", "ABC1", "B1")
+    assert gauge_index.validate() == [
+        "ABC1 is listed 2 times: 'ABC1 - RIVER - FOO' at (0, 0), "
+        "'ABC1 - RIVER - FOO AGAIN' at (1, 1)",
+        "option (1, 2) (NO VALUE) has no value",
+    ]
+
+
+def test_cnrfc_gauge_duplicates_are_reported():
+    duplicates = get_gauge_index().duplicates
+
+    assert set(duplicates) == {"YDRC1", "NCOC1", "GYRC1", "CBAC1", "HPIC1", "POHC1"}
+    assert all(len(found) == 2 for found in duplicates.values())
+    assert get_gauge_index().missing == ()
+
+
+def test_check_accepts_typed_ids():
+    gauge_index = GaugeIndex(GROUPS)
+
+    assert gauge_index.check("AB1") == "AB1"
+    assert gauge_index.check(" ab1 ") == "AB1"
+    with pytest.raises(ValueError, match="is not a CNRFC gauge location"):
+        gauge_index.check("ZZZ1")
+
+
+def test_expand_basin_groups():
+    gauge_index = GaugeIndex(GROUPS)
+
+    assert gauge_index.expand(["South"]) == ["ACX1", "ABC1", "B1"]
+    assert gauge_index.expand(["b1", "North", "South"]) == [
+        "B1",
+        "ABC1",
+        "AB1",
+        "ABD1",
+        "ACX1",
+    ]
+    assert gauge_index.expand([]) == []
+    with pytest.raises(ValueError):
+        gauge_index.expand(["North", "East"])
+
+
+def test_search_prefix_bounds():
+    gauge_index = GaugeIndex(GROUPS)
+
+    assert gauge_index.search_prefix("ab") == ["AB1", "ABC1", "ABD1"]
+    assert gauge_index.search_prefix("AB1") == ["AB1"]
+    assert gauge_index.search_prefix("abc1") == ["ABC1"]
+    assert gauge_index.search_prefix("abc10") == []
+    assert gauge_index.search_prefix("a") == ["AB1", "ABC1", "ABD1", "ACX1"]
+    assert gauge_index.search_prefix("b") == ["B1"]
+    assert gauge_index.search_prefix("c") == []
+    assert gauge_index.search_prefix("") == list(sorted(gauge_index.gauges))
+
+
+def test_search_matches_labels_not_the_gaps_between_them():
+    gauge_index = GaugeIndex(GROUPS)
+
+    # the label of ABC1 ends in FOO and the next one starts with AB1, so only a
+    # search running from one label into the next would match these
+    assert gauge_index.search("foo\nab1") == []
+    assert gauge_index.search("fooab1") == []
+    assert gauge_index.search("- foo") == ["ABC1", "ABD1", "ACX1"]
+    assert gauge_index.search("abc1 - river") == ["ABC1"]
+    assert gauge_index.search("end") == ["B1"]
+    assert gauge_index.search("b1 - last - end") == ["B1"]
+    assert gauge_index.search("again") == []
+    assert gauge_index.search("") == []
+
+
+def test_search_lists_prefix_matches_first_and_each_gauge_once():
+    gauge_index = GaugeIndex(GROUPS)
+
+    # ABD1 mentions foo twice, ACX1 is only found through its label
+    assert gauge_index.search("FOO") == ["ABC1", "ABD1", "ACX1"]
+    assert gauge_index.search("b1") == ["B1", "AB1"]
+    assert gauge_index.search("bar") == ["AB1", "ACX1"]
+
+
+def test_search_limit():
+    gauge_index = GaugeIndex(GROUPS)
+
+    assert gauge_index.search("foo", limit=2) == ["ABC1", "ABD1"]
+    assert gauge_index.search("b1", limit=1) == ["B1"]
+    assert gauge_index.search("river", limit=0) == []
+    assert len(get_gauge_index().search("river", limit=5)) == 5
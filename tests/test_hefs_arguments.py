@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+from tethysdash_plugin_cnrfc.hefs import HEFS, HEFS_PERCENTILES
+
+
+def test_window_and_encoding_options_are_dashboard_arguments():
+    for argument in (
+        "horizon_hours",
+        "history_hours",
+        "max_points",
+        "compact_ensemble_members",
+        "binary_arrays",
+        "binary_dates",
+        "percentiles",
+    ):
+        assert argument in HEFS.visualization_args
+
+
+@pytest.mark.parametrize("horizon_hours", [0, -24, 1.5, "soon", "0"])
+def test_non_positive_or_fractional_horizons_are_rejected(horizon_hours):
+    with pytest.raises(ValueError, match="horizon_hours"):
+        HEFS("CREC1", False, horizon_hours=horizon_hours)
+
+
+def test_number_arguments_are_read_from_dashboard_text():
+    source = HEFS("CREC1", False, horizon_hours="72", history_hours="0", max_points="")
+    assert source.horizon_hours == 72
+    assert source.history_hours == 0
+    assert source.max_points is None
+
+
+def test_negative_history_and_max_points_are_rejected():
+    with pytest.raises(ValueError, match="history_hours"):
+        HEFS("CREC1", False, history_hours=-1)
+    with pytest.raises(ValueError, match="max_points"):
+        HEFS("CREC1", False, max_points=0)
+
+
+@pytest.mark.parametrize(
+    "percentiles", [[5, 50, 95], [-0.1, 0.5], "5, 50, 95", "0.1, high", "nan", ","]
+)
+def test_percentiles_outside_zero_to_one_are_rejected(percentiles):
+    with pytest.raises(ValueError, match="percentiles"):
+        HEFS("CREC1", False, percentiles=percentiles)
+
+
+def test_percentiles_are_read_from_dashboard_text():
+    assert HEFS("CREC1", percentiles="0.9, 0.1,0.5").percentiles == (0.1, 0.5, 0.9)
+    assert HEFS("CREC1", percentiles="0.25 0.75").percentiles == (0.25, 0.75)
+    assert HEFS("CREC1", percentiles="").percentiles == HEFS_PERCENTILES
+    assert HEFS("CREC1", percentiles=None).percentiles == HEFS_PERCENTILES
+
+
+def test_percentile_lines_follow_the_argument(fake_client):
+    source = HEFS("CREC1", percentiles="0.1, 0.9")
+    source.http_client = fake_client
+    names = {trace["name"] for trace in source.read()["data"]}
+
+    assert {"10% Percentile", "90% Percentile"} <= names
+    assert "25% Percentile" not in names
+
+
+def test_horizon_limits_the_chart(fake_client):
+    source = HEFS("CREC1", False, horizon_hours="72", history_hours=24)
+    source.http_client = fake_client
+    figure = source.read()
+
+    dates = np.array(
+        [date.replace(" ", "T") for trace in figure["data"] for date in trace["x"]],
+        dtype="datetime64[m]",
+    )
+    assert dates.max() == np.datetime64("2024-01-13T11:00")
+    assert dates.min() >= np.datetime64("2024-01-09T12:00")
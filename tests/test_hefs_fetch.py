@@ -0,0 +1,41 @@
+import time
+from tethysdash_plugin_cnrfc.hefs import HEFS
+from tethysdash_plugin_cnrfc.http_client import HTTPClient
+from tethysdash_plugin_cnrfc.memo import ensemble_cache
+from tethysdash_plugin_cnrfc.rating_curves import clear_rating_curve_cache
+from conftest import FakeCNRFC
+
+# seconds each upstream resource of get_cnrfc_hefs_data is held back by
+DELAYS = {
+    "_rating.js": 0.3,
+    "_hefs_csv_hourly_sstg.csv": 0.5,
+    "graphicalRVF_printer.php": 0.4,
+}
+
+
+def timed_hefs_data(delays):
+    client = HTTPClient(transport=FakeCNRFC(delays=delays), cache=None)
+    source = HEFS("CREC1", True)
+    source.http_client = client
+    hefs_metadata = source.get_hefs_metadata(source.fetch_hefs_page())
+    ensemble_cache.clear()
+    clear_rating_curve_cache()
+
+    start = time.perf_counter()
+    source.get_cnrfc_hefs_data(hefs_metadata)
+    elapsed = time.perf_counter() - start
+    client.close()
+
+    return elapsed
+
+
+def test_upstream_fetches_overlap():
+    # the first read pays for importing numpy and pandas, so time parsing after it
+    timed_hefs_data({})
+    parsing = timed_hefs_data({})
+
+    elapsed = timed_hefs_data(DELAYS)
+
+    slowest = max(DELAYS.values())
+    assert slowest <= elapsed < slowest + parsing + 0.2
+    assert elapsed < sum(DELAYS.values()) - 0.3
@@ -0,0 +1,50 @@
+import os
+import time
+from datetime import datetime, timedelta
+import pytest
+from tethysdash_plugin_cnrfc.hefs import HEFS
+from conftest import ISSUANCE_TIME, epoch_ms
+
+
+@pytest.fixture
+def pacific_time():
+    """Run the test with the process in US Pacific time"""
+    previous = os.environ.get("TZ")
+    os.environ["TZ"] = "America/Los_Angeles"
+    time.tzset()
+    yield
+    if previous is None:
+        del os.environ["TZ"]
+    else:
+        os.environ["TZ"] = previous
+    time.tzset()
+
+
+def utc_dates(hours, date_format):
+    return [
+        (ISSUANCE_TIME + timedelta(hours=hour)).strftime(date_format)
+        for hour in hours
+    ]
+
+
+def test_hydro_and_forcing_dates_are_utc_whatever_the_server_time(
+    pacific_time, fake_client
+):
+    # the page's epoch milliseconds would read eight hours earlier as local time
+    assert datetime.fromtimestamp(epoch_ms(ISSUANCE_TIME) / 1000).hour == 4
+
+    source = HEFS("CREC1", True)
+    source.http_client = fake_client
+    traces = {trace["name"]: trace for trace in source.read()["data"]}
+
+    assert traces["Observed"]["x"] == utc_dates(range(-200, 0), "%Y-%m-%dT%H:%M")
+    assert traces["Deterministic Forecast"]["x"] == utc_dates(
+        range(0, 240, 6), "%Y-%m-%dT%H:%M"
+    )
+    assert traces["Observed Rain + Melt"]["x"] == utc_dates(
+        range(-48, 0, 6), "%Y-%m-%dT%H"
+    )
+    assert traces["Forecast Rain + Melt"]["x"] == utc_dates(
+        range(0, 144, 6), "%Y-%m-%dT%H"
+    )
+    assert traces["Minimum"]["x"][0] == "2024-01-10 12:00:00"
@@ -0,0 +1,99 @@
+import os
+import pytest
+from tethysdash_plugin_cnrfc import http_client
+from tethysdash_plugin_cnrfc.http_cache import HTTPCache, get_default_cache
+from tethysdash_plugin_cnrfc.http_client import HTTPClient, get_client
+from conftest import LAST_MODIFIED, FakeCNRFC, rating_js
+
+RATING_URL = "https://www.cnrfc.noaa.gov/data/ratings/{}_rating.js"
+
+
+@pytest.fixture
+def fake_cnrfc():
+    return FakeCNRFC(validators=True)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return HTTPCache(str(tmp_path / "http"))
+
+
+@pytest.fixture
+def client(fake_cnrfc, cache):
+    client = HTTPClient(transport=fake_cnrfc, cache=cache)
+    yield client
+    client.close()
+
+
+def test_validators_are_stored(client, cache):
+    url = RATING_URL.format("CREC1")
+    client.get(url)
+
+    metadata = cache.load(url)
+    assert metadata["etag"].startswith('"')
+    assert metadata["last_modified"] == LAST_MODIFIED
+    assert cache.stats() == {"hits": 0, "misses": 1}
+
+
+def test_not_modified_responses_are_served_from_the_cache(
+    client, cache, fake_cnrfc
+):
+    url = RATING_URL.format("CREC1")
+    client.get(url)
+    response = client.get(url)
+
+    assert fake_cnrfc.not_modified == 1
+    assert response.status_code == 200
+    assert response.text == rating_js()
+    assert cache.stats() == {"hits": 1, "misses": 1}
+
+
+def test_missing_bodies_are_fetched_again(client, cache, fake_cnrfc):
+    url = RATING_URL.format("CREC1")
+    client.get(url)
+    os.remove(cache._paths(url)[1])
+    response = client.get(url)
+
+    assert fake_cnrfc.not_modified == 1
+    assert len(fake_cnrfc.requests) == 3
+    assert response.text == rating_js()
+    assert os.path.exists(cache._paths(url)[1])
+
+
+def test_least_recently_used_responses_are_evicted(client, cache):
+    cache.max_size = 2 * len(rating_js().encode())
+    first, second, third = (RATING_URL.format(gauge) for gauge in "ABC")
+    client.get(first)
+    client.get(second)
+    os.utime(cache._paths(first)[0], (1, 1))
+    os.utime(cache._paths(second)[0], (2, 2))
+    client.get(first)
+    client.get(third)
+
+    assert cache.load(first) is not None
+    assert cache.load(second) is None
+    assert not os.path.exists(cache._paths(second)[1])
+    assert cache.load(third) is not None
+
+
+def test_purge(client, cache):
+    first, second = (RATING_URL.format(gauge) for gauge in "AB")
+    client.get(first)
+    client.get(second)
+
+    cache.purge(first)
+    assert cache.load(first) is None
+    assert cache.load(second) is not None
+    cache.purge()
+    assert cache.load(second) is None
+    assert os.listdir(cache.directory) == []
+
+
+def test_unwritable_cache_directory_falls_back_to_no_cache(tmp_path, monkeypatch):
+    not_a_directory = tmp_path / "file"
+    not_a_directory.write_text("")
+    monkeypatch.setenv("TETHYSDASH_CNRFC_CACHE_DIR", str(not_a_directory / "cache"))
+    monkeypatch.setattr(http_client, "_client", None)
+
+    assert get_default_cache() is None
+    assert get_client().cache is None
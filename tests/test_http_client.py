@@ -0,0 +1,97 @@
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+import pytest
+from tethysdash_plugin_cnrfc import http_client
+from tethysdash_plugin_cnrfc.hefs import HEFS_FETCH_WORKERS, get_batch_workers
+from tethysdash_plugin_cnrfc.http_client import HTTPClient, configure, get_client
+from conftest import FakeCNRFC
+
+
+class FlakyHandler(BaseHTTPRequestHandler):
+    """Answers 503 until it has failed failures times, and 200 after that"""
+
+    failures = 1
+    requests = 0
+
+    def do_GET(self):
+        type(self).requests += 1
+        failing = self.requests <= self.failures
+        body = b"" if failing else b"ok"
+        self.send_response(503 if failing else 200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def flaky_server():
+    FlakyHandler.requests = 0
+    server = HTTPServer(("127.0.0.1", 0), FlakyHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/"
+    server.shutdown()
+    server.server_close()
+
+
+class TimeoutRecordingCNRFC(FakeCNRFC):
+    def __init__(self):
+        super(TimeoutRecordingCNRFC, self).__init__()
+        self.timeouts = []
+
+    def send(self, request, timeout=None, **kwargs):
+        self.timeouts.append(timeout)
+        return super(TimeoutRecordingCNRFC, self).send(
+            request, timeout=timeout, **kwargs
+        )
+
+
+@pytest.fixture
+def isolated_shared_client(monkeypatch):
+    monkeypatch.setattr(http_client, "_client", None)
+
+
+def test_transient_statuses_are_retried(flaky_server):
+    client = HTTPClient(backoff_factor=0, cache=None)
+    response = client.get(flaky_server)
+
+    assert response.status_code == 200
+    assert response.text == "ok"
+    assert FlakyHandler.requests == 2
+
+
+def test_retries_give_up_with_the_last_response(flaky_server):
+    client = HTTPClient(retries=1, backoff_factor=0, cache=None)
+    FlakyHandler.failures = 5
+    try:
+        response = client.get(flaky_server)
+    finally:
+        FlakyHandler.failures = 1
+
+    assert response.status_code == 503
+    assert FlakyHandler.requests == 2
+
+
+def test_timeouts_are_passed_to_the_transport():
+    transport = TimeoutRecordingCNRFC()
+    client = HTTPClient(connect_timeout=1, read_timeout=2, transport=transport)
+    client.get("https://www.cnrfc.noaa.gov/ensembleProduct.php")
+    client.head("https://www.cnrfc.noaa.gov/ensembleProduct.php")
+    client.get("https://www.cnrfc.noaa.gov/ensembleProduct.php", timeout=7)
+
+    assert transport.timeouts == [(1, 2), (1, 2), 7]
+
+
+def test_configure_replaces_the_shared_client(isolated_shared_client):
+    configure(max_connections=2 * HEFS_FETCH_WORKERS, cache=None)
+    client = get_client()
+
+    assert client.max_connections == 2 * HEFS_FETCH_WORKERS
+    adapter = client.session.get_adapter("https://")
+    assert adapter._pool_maxsize == client.max_connections
+    assert get_batch_workers() == 2
+    configure(max_connections=1, cache=None)
+    assert get_batch_workers() == 1
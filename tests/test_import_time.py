@@ -0,0 +1,67 @@
+import re
+import subprocess
+import sys
+from pathlib import Path
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+# libraries only some drivers read with, which listing the catalog must not import
+HEAVY_MODULES = ("numpy", "pandas", "bs4", "hjson", "requests")
+# milliseconds importing every driver module may take on top of intake, well above
+# the 40 to 50 it takes
+IMPORT_TIME_BUDGET = 200
+
+
+def entry_point_modules():
+    pyproject = (ROOT / "pyproject.toml").read_text()
+    section = pyproject.split('[project.entry-points."intake.drivers"]')[1]
+    section = section.split("\n[")[0]
+
+    return re.findall(r'^\w+ = "([\w.]+):\w+"$', section, re.M)
+
+
+def run_python(code, *options):
+    return subprocess.run(
+        [sys.executable, *options, "-c", code],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+def test_entry_points_are_found():
+    assert "tethysdash_plugin_cnrfc.hefs" in entry_point_modules()
+
+
+@pytest.mark.parametrize("module", entry_point_modules())
+def test_entry_point_does_not_import_heavy_modules(module):
+    code = (
+        f"import sys, {module}\n"
+        f"print(' '.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    )
+
+    assert run_python(code).stdout.split() == []
+
+
+def test_entry_points_import_within_budget():
+    code = "import intake.source.base\n" + "\n".join(
+        f"import {module}" for module in entry_point_modules()
+    )
+    best = None
+    for _ in range(3):
+        lines = run_python(code, "-X", "importtime").stderr.splitlines()
+        # the top level imports after intake, each with its cumulative microseconds
+        start = 1 + max(
+            number
+            for number, line in enumerate(lines)
+            if line.endswith("| intake.source.base")
+        )
+        elapsed = 0
+        for line in lines[start:]:
+            match = re.match(r"import time:\s+\d+ \|\s+(\d+) \| \S", line)
+            if match:
+                elapsed += int(match.group(1))
+        best = elapsed if best is None else min(best, elapsed)
+
+    assert best / 1000 < IMPORT_TIME_BUDGET
@@ -0,0 +1,53 @@
+import json
+from tethysdash_plugin_cnrfc import memo
+from tethysdash_plugin_cnrfc.memo import LRUCache, estimate_size
+
+
+def test_entries_expire_after_max_age(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(memo.time, "monotonic", lambda: now[0])
+    cache = LRUCache(1024, max_age=60)
+    cache.put("figure", {"data": []})
+
+    now[0] += 59
+    assert cache.get("figure") == {"data": []}
+    now[0] += 2
+    assert cache.get("figure") is None
+    assert len(cache) == 0
+    assert cache.size == 0
+
+
+def test_entries_without_max_age_do_not_expire(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(memo.time, "monotonic", lambda: now[0])
+    cache = LRUCache(1024)
+    cache.put("figure", {"data": []})
+
+    now[0] += 24 * 60 * 60
+    assert cache.get("figure") == {"data": []}
+
+
+def test_least_recently_used_entries_are_evicted():
+    cache = LRUCache(100, sizeof=lambda value: 40)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+
+
+def test_estimate_size_is_close_to_the_serialized_figure_size():
+    trace = {
+        "type": "scatter",
+        "name": "Observed",
+        "x": [f"2024-01-10 {hour % 24:02d}:00:00" for hour in range(2000)],
+        "y": [round(18.5 + hour / 1000, 2) for hour in range(2000)],
+        "customdata": [[1000 + hour, "ft"] for hour in range(2000)],
+    }
+    figure = {"data": [trace] * 5, "layout": {"title": "HEFS"}, "config": {}}
+
+    serialized = len(json.dumps(figure))
+    assert 0.5 * serialized < estimate_size(figure) < 1.5 * serialized
@@ -0,0 +1,75 @@
+import pytest
+from tethysdash_plugin_cnrfc import prewarm
+from tethysdash_plugin_cnrfc.gauges import get_gauge_index
+from tethysdash_plugin_cnrfc.hefs import HEFS
+from tethysdash_plugin_cnrfc.http_client import set_client
+from tethysdash_plugin_cnrfc.memo import FIGURE_CACHE_MAX_BYTES, figure_cache
+from tethysdash_plugin_cnrfc.prewarm import PREWARM_ALL_GAUGES, HEFSPrewarmer
+
+
+@pytest.fixture
+def shared_client(fake_client):
+    previous = set_client(fake_client)
+    yield fake_client
+    set_client(previous)
+
+
+def figure_requests(fake_cnrfc):
+    return [path for _, path in fake_cnrfc.requests if path.endswith(".csv")]
+
+
+def test_gauges_must_be_listed():
+    with pytest.raises(ValueError):
+        HEFSPrewarmer([])
+    with pytest.raises(TypeError):
+        HEFSPrewarmer()
+
+
+def test_all_gauges_and_basin_groups_can_be_prewarmed():
+    gauge_index = get_gauge_index()
+
+    assert HEFSPrewarmer(PREWARM_ALL_GAUGES).gauge_locations == list(gauge_index)
+    assert HEFSPrewarmer(["North Coast"]).gauge_locations == list(
+        gauge_index.gauges_in_group("North Coast")
+    )
+
+
+def test_figure_cache_is_grown_for_the_prewarm_budget():
+    HEFSPrewarmer(["CREC1"], max_bytes=FIGURE_CACHE_MAX_BYTES)
+
+    assert figure_cache.max_bytes == 2 * FIGURE_CACHE_MAX_BYTES
+
+
+def test_gauges_past_the_budget_are_skipped(shared_client, fake_cnrfc):
+    prewarmer = HEFSPrewarmer(["CREC1", "FTDC1"], max_workers=1)
+    assert prewarmer.poll() == ["CREC1", "FTDC1"]
+    size = prewarmer.warm_bytes
+    figure_cache.clear()
+
+    prewarmer.max_bytes = size // 2
+    assert prewarmer.poll() == ["CREC1"]
+    assert prewarmer.poll() == []
+    assert prewarmer.warm_bytes < size
+
+
+def test_warm_figures_are_not_built_again(shared_client, fake_cnrfc):
+    prewarmer = HEFSPrewarmer(["CREC1"])
+
+    assert prewarmer.poll() == ["CREC1"]
+    built = len(figure_requests(fake_cnrfc))
+    assert prewarmer.poll() == []
+    assert len(figure_requests(fake_cnrfc)) == built
+
+
+def test_evicted_figures_are_built_again(shared_client, fake_cnrfc):
+    prewarmer = HEFSPrewarmer(["CREC1"])
+    prewarmer.poll()
+    figure_cache.clear()
+
+    assert prewarmer.poll() == ["CREC1"]
+    for arguments in prewarm.PREWARM_HEFS_ARGUMENTS:
+        source = HEFS("CREC1", **arguments)
+        issuance_time = source.get_hefs_metadata(source.fetch_hefs_page())[
+            "issuance_time"
+        ]
+        assert figure_cache.get(source.get_figure_cache_key(issuance_time))
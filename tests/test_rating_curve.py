@@ -0,0 +1,107 @@
+import numpy as np
+import pytest
+from tethysdash_plugin_cnrfc.rating_curves import RatingCurve
+from tethysdash_plugin_cnrfc.utilities import (
+    interpolate_flow_from_rating_curve,
+    interpolate_flows_from_rating_curve,
+    interpolate_stage_from_rating_curve,
+    interpolate_stages_from_rating_curve,
+)
+
+
+def random_table(rng, size):
+    stages = np.round(np.cumsum(rng.uniform(0.01, 2, size)), 2)
+    flows = np.round(np.cumsum(rng.uniform(0.5, 5000, size)), 1)
+    return stages, flows
+
+
+def lookups(rng, table):
+    """Values below, inside and above the table, exact hits, zeros and negatives"""
+    low, high = min(table), max(table)
+    return np.concatenate(
+        [
+            rng.uniform(low, high, 200),
+            rng.uniform(0, max(low, 0.01), 20),
+            rng.uniform(high, high * 3, 20),
+            -rng.uniform(0.01, 100, 10),
+            np.asarray(table, dtype=np.float64),
+            [0.0, low, high],
+        ]
+    )
+
+
+def assert_same(actual, expected):
+    """Exact equality, up to the last ulp of numpy's pow on huge extrapolations"""
+    expected = np.asarray(expected, dtype=np.float64)
+    huge = np.abs(expected) > 1e11
+    np.testing.assert_array_equal(actual[~huge], expected[~huge])
+    np.testing.assert_allclose(actual[huge], expected[huge], rtol=1e-13)
+
+
+def assert_matches_scalar(stages, flows, rng):
+    stages = list(stages)
+    flows = list(flows)
+    curve = RatingCurve(stages, flows)
+
+    flow_values = lookups(rng, flows)
+    expected = [
+        interpolate_stage_from_rating_curve(stages, flows, flow) for flow in flow_values
+    ]
+    assert_same(
+        interpolate_stages_from_rating_curve(stages, flows, flow_values), expected
+    )
+    assert_same(curve.stage_from_flow(flow_values), expected)
+
+    stage_values = lookups(rng, stages)
+    expected = [
+        interpolate_flow_from_rating_curve(stages, flows, stage)
+        for stage in stage_values
+    ]
+    assert_same(
+        interpolate_flows_from_rating_curve(stages, flows, stage_values), expected
+    )
+    assert_same(curve.flow_from_stage(stage_values), expected)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_random_tables_match_scalar(seed):
+    rng = np.random.default_rng(seed)
+    stages, flows = random_table(rng, int(rng.integers(3, 400)))
+    assert_matches_scalar(stages, flows, rng)
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_non_monotonic_tables_match_scalar(seed):
+    rng = np.random.default_rng(seed)
+    stages, flows = random_table(rng, 60)
+    # a stretch of the table out of order, as some published tables are
+    swap = int(rng.integers(5, 50))
+    stages[swap], stages[swap + 1] = stages[swap + 1], stages[swap]
+    flows[swap + 3], flows[swap + 4] = flows[swap + 4], flows[swap + 3]
+    assert not RatingCurve(stages, flows).monotonic
+    assert_matches_scalar(stages, flows, rng)
+
+
+def test_duplicate_entries_match_scalar():
+    rng = np.random.default_rng(0)
+    stages = [1.0, 1.0, 2.5, 2.5, 3.0, 4.0, 4.0]
+    flows = [10.0, 10.0, 50.0, 80.0, 80.0, 300.0, 300.0]
+    assert_matches_scalar(stages, flows, rng)
+
+
+def test_zero_and_negative_tables_match_scalar():
+    rng = np.random.default_rng(0)
+    stages = [-1.0, 0.0, 0.5, 1.5, 3.0, 6.0]
+    flows = [0.0, 0.0, 2.0, 40.0, 400.0, 5000.0]
+    assert_matches_scalar(stages, flows, rng)
+
+
+def test_exact_table_hits_return_table_values():
+    stages, flows = random_table(np.random.default_rng(1), 50)
+    np.testing.assert_array_equal(
+        interpolate_stages_from_rating_curve(stages, flows, flows),
+        np.round(stages, 2),
+    )
+    np.testing.assert_array_equal(
+        RatingCurve(stages, flows).flow_from_stage(stages), np.round(flows, 2)
+    )
@@ -0,0 +1,71 @@
+import time
+from urllib.parse import urlparse
+import pytest
+from tethysdash_plugin_cnrfc import http_client
+from tethysdash_plugin_cnrfc.hefs import HEFS
+from tethysdash_plugin_cnrfc.http_client import HTTPClient
+from tethysdash_plugin_cnrfc.memo import ensemble_cache, figure_cache
+from tethysdash_plugin_cnrfc.rating_curves import clear_rating_curve_cache
+from conftest import FakeCNRFC
+
+FAILING_GAUGE = "FTDC1"
+
+
+class OneFailingGaugeCNRFC(FakeCNRFC):
+    """Serves every gauge except FAILING_GAUGE, whose HEFS csvs are missing"""
+
+    def body(self, url):
+        path = urlparse(url).path
+        if FAILING_GAUGE in path and path.endswith(".csv"):
+            return None
+
+        return super(OneFailingGaugeCNRFC, self).body(url)
+
+
+@pytest.fixture
+def shared_fake_cnrfc(monkeypatch):
+    fake_cnrfc = OneFailingGaugeCNRFC(delay=0.05)
+    client = HTTPClient(transport=fake_cnrfc, cache=None, max_connections=9)
+    monkeypatch.setattr(http_client, "_client", client)
+    yield fake_cnrfc
+    client.close()
+
+
+def test_read_many_defaults_to_the_driver_defaults(shared_fake_cnrfc):
+    figures = HEFS.read_many(["CREC1"])
+
+    assert figures["CREC1"] == HEFS("CREC1").read()
+
+
+def test_one_failing_gauge_does_not_fail_the_others(shared_fake_cnrfc):
+    figures = HEFS.read_many(["CREC1", FAILING_GAUGE, "ORIC1"])
+
+    assert list(figures) == ["CREC1", FAILING_GAUGE, "ORIC1"]
+    assert isinstance(figures[FAILING_GAUGE], Exception)
+    for gauge_location in ("CREC1", "ORIC1"):
+        assert figures[gauge_location]["data"]
+
+
+def test_basin_groups_are_read_for_each_gauge(shared_fake_cnrfc):
+    figures = HEFS.read_many(["ORIC1", "North Coast"], include_rain_melt_plot=True)
+
+    assert list(figures)[0] == "ORIC1"
+    assert len(figures) == 17
+    assert sum(isinstance(figure, Exception) for figure in figures.values()) == 1
+
+
+def test_gauges_are_read_concurrently(shared_fake_cnrfc):
+    gauges = ["CREC1", "ORIC1", "ARCC1"]
+    start = time.perf_counter()
+    for gauge_location in gauges:
+        HEFS(gauge_location).read()
+    sequential = time.perf_counter() - start
+    figure_cache.clear()
+    ensemble_cache.clear()
+    clear_rating_curve_cache()
+
+    start = time.perf_counter()
+    HEFS.read_many(gauges, max_workers=3)
+    concurrent = time.perf_counter() - start
+
+    assert concurrent < sequential * 0.75
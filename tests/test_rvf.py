@@ -0,0 +1,53 @@
+import re
+import hjson
+import pytest
+from tethysdash_plugin_cnrfc.rvf import iter_rvf_data, scan_rvf_page
+from conftest import rvf_page
+
+# the patterns the river forecast page was read with before the single pass scanner
+BASELINE_PATTERNS = {
+    "series": r"chart.addSeries\((.*),false\);",
+    "thresholds": r"chart.yAxis\[0\].addPlotLine\((.*)\);",
+    "forcing": r"chart2.addSeries\((.*),false\);",
+}
+
+
+def baseline(page):
+    return {
+        name: [hjson.loads(payload) for payload in re.findall(pattern, page)]
+        for name, pattern in BASELINE_PATTERNS.items()
+    }
+
+
+def streamed(page, chunk_size):
+    chunks = [page[start:][:chunk_size] for start in range(0, len(page), chunk_size)]
+    parsed = {name: [] for name in BASELINE_PATTERNS}
+    for name, payload in iter_rvf_data(chunks):
+        parsed[name].append(payload)
+
+    return parsed
+
+
+def scanned(page):
+    return {
+        name: [hjson.loads(payload) for payload in payloads]
+        for name, payloads in scan_rvf_page(page).items()
+    }
+
+
+def trailing_statements(page):
+    """The page with another statement after each series call on the same line"""
+    return page.replace(",false);\n", ",false); chart.redraw();\n")
+
+
+@pytest.mark.parametrize("trailing", [False, True])
+def test_scanner_matches_the_baseline_patterns(trailing):
+    page = trailing_statements(rvf_page()) if trailing else rvf_page()
+    expected = baseline(page)
+    assert len(expected["series"]) == 2
+    assert len(expected["thresholds"]) == 2
+    assert len(expected["forcing"]) == 2
+
+    assert scanned(page) == expected
+    for chunk_size in (97, 4096, len(page)):
+        assert streamed(page, chunk_size) == expected
@@ -1,5 +1,11 @@
 CNRFCEnsembleBaseUrl = "https://www.cnrfc.noaa.gov/images/ensembles/"
 
+# HEFS ensemble csv variants in the order they are preferred, with their units
+CNRFCHefsCsvVariants = {
+    "sstg": ("https://www.cnrfc.noaa.gov/csv/{gauge}_hefs_csv_hourly_sstg.csv", "feet"),
+    "hourly": ("https://www.cnrfc.noaa.gov/csv/{gauge}_hefs_csv_hourly.csv", "cfs"),
+}
+
 CNRFCGauges = [
     {
         "label": "North Coast",
@@ -1,5 +1,6 @@
 from intake.source import base
-from .constants import CNRFCGauges, CNRFCEnsembleBaseUrl
+from .constants import CNRFCEnsembleBaseUrl
+from .gauges import GAUGE_LOCATION_ARGUMENT, get_gauge_index
 
 
 class VolumeExceedance(base.DataSource):
@@ -15,7 +16,7 @@ class VolumeExceedance(base.DataSource):
     ]
     visualization_description = "Depicts the daily streamflow volume accumulation for the next 5 days and compares values to exceedance probabilities. More information can be found at https://www.cnrfc.noaa.gov/ensembleProduct.php"
     visualization_args = {
-        "gauge_location": CNRFCGauges,
+        "gauge_location": GAUGE_LOCATION_ARGUMENT,
     }
     visualization_group = "CNRFC"
     visualization_label = "5 Day Streamflow Volume Exceedance"
@@ -24,7 +25,7 @@ class VolumeExceedance(base.DataSource):
 
     def __init__(self, gauge_location, metadata=None):
         # store important kwargs
-        self.gauge_location = gauge_location
+        self.gauge_location = get_gauge_index().check(gauge_location)
         super(VolumeExceedance, self).__init__(metadata=metadata)
 
     def read(self):
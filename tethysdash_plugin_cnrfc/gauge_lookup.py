@@ -0,0 +1,52 @@
+from intake.source import base
+from .gauges import get_gauge_index
+
+# most gauges listed for one search
+GAUGE_LOOKUP_LIMIT = 50
+
+
+class GaugeLookup(base.DataSource):
+    container = "python"
+    version = "0.0.1"
+    name = "cnrfc_gauge_lookup"
+    visualization_tags = [
+        "cnrfc",
+        "gauge",
+        "lookup",
+        "search",
+    ]
+    visualization_description = "A table of the CNRFC gauges whose id or name contains the search text, with the basin group each belongs to."
+    visualization_args = {
+        "search": "text",
+    }
+    visualization_group = "CNRFC"
+    visualization_label = "Gauge Lookup"
+    visualization_type = "table"
+    visualization_attribution = "CNRFC"
+
+    def __init__(self, search="", metadata=None):
+        # store important kwargs
+        self.search = search or ""
+        super(GaugeLookup, self).__init__(metadata=metadata)
+
+    def read(self):
+        """Return the gauges matching the search text"""
+        gauge_index = get_gauge_index()
+        search = self.search.strip()
+        if search:
+            gauges = gauge_index.search(search, limit=GAUGE_LOOKUP_LIMIT)
+        else:
+            gauges = gauge_index.gauges[:GAUGE_LOOKUP_LIMIT]
+        title = f"CNRFC Gauges Matching '{search}'" if search else "CNRFC Gauges"
+
+        return {
+            "title": title,
+            "data": [
+                {
+                    "gauge": gauge,
+                    "label": gauge_index.label(gauge),
+                    "group": gauge_index.group(gauge),
+                }
+                for gauge in gauges
+            ],
+        }
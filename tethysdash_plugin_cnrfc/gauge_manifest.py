@@ -0,0 +1,179 @@
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from .constants import CNRFCHefsCsvVariants
+from .gauges import get_gauge_index
+from .http_cache import get_cache_dir
+from .http_client import get_client
+from .rating_curves import RATING_CURVE_URL
+
+# how old, in seconds, the manifest may get before it is refreshed in the background
+MANIFEST_MAX_AGE = 24 * 60 * 60
+MANIFEST_REFRESH_WORKERS = 4
+# seconds a resource recorded as missing is trusted before it is looked for again,
+# so that a 404 the server gave for a moment does not disable a gauge for good
+MANIFEST_MISSING_MAX_AGE = 60 * 60
+
+
+class GaugeManifest:
+    """Remembers which HEFS resources each gauge serves
+
+    Every gauge maps to the HEFS csv variant it was last served from (a key of
+    CNRFCHefsCsvVariants) and whether it has a rating table, so reads can go
+    straight to the right csv instead of discovering it through a failed download.
+    Entries recording a missing resource also record when they were checked, and
+    are only trusted for MANIFEST_MISSING_MAX_AGE seconds. The manifest is persisted
+    as json in the plugin cache directory, or only kept in memory when that
+    directory can not be written.
+    """
+
+    def __init__(self, path=None):
+        if path is None:
+            try:
+                path = os.path.join(get_cache_dir(), "gauge_manifest.json")
+            except OSError as e:
+                print(f"Unable to save the gauge manifest, keeping it in memory: {e}")
+        self.path = path
+        self.lock = threading.Lock()
+        self.refresh_thread = None
+        self.updated = 0
+        self.gauges = {}
+        if path is None:
+            return
+        try:
+            with open(self.path) as manifest_file:
+                manifest = json.load(manifest_file)
+            self.updated = manifest["updated"]
+            self.gauges = manifest["gauges"]
+        except (OSError, ValueError, KeyError):
+            pass
+
+    def get(self, gauge_location):
+        with self.lock:
+            return dict(self.gauges.get(gauge_location, {}))
+
+    def hefs_csv_variants(self, gauge_location):
+        """Return the csv variants to try for a gauge, the known one first"""
+        variants = list(CNRFCHefsCsvVariants)
+        known_variant = self.get(gauge_location).get("hefs_csv")
+        if known_variant in variants:
+            variants.remove(known_variant)
+            variants.insert(0, known_variant)
+
+        return variants
+
+    def is_missing(self, gauge_location, capability, max_age=MANIFEST_MISSING_MAX_AGE):
+        """Return whether capability was recorded missing under max_age seconds ago"""
+        entry = self.get(gauge_location)
+        if entry.get(capability) is not False:
+            return False
+
+        return time.time() - entry.get("checked", 0) < max_age
+
+    def record(self, gauge_location, **capabilities):
+        with self.lock:
+            entry = self.gauges.setdefault(gauge_location, {})
+            if False in capabilities.values():
+                capabilities["checked"] = time.time()
+            elif all(entry.get(key) == value for key, value in capabilities.items()):
+                return
+            entry.update(capabilities)
+        self.save()
+
+    def invalidate(self, gauge_location):
+        with self.lock:
+            if self.gauges.pop(gauge_location, None) is None:
+                return
+        self.save()
+
+    def save(self):
+        if self.path is None:
+            return
+        with self.lock:
+            manifest = {"updated": self.updated, "gauges": self.gauges}
+            temporary_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}"
+            try:
+                with open(temporary_path, "w") as manifest_file:
+                    json.dump(manifest, manifest_file)
+                os.replace(temporary_path, self.path)
+            except OSError as e:
+                print(f"Unable to save the gauge manifest: {e}")
+
+    def probe(self, gauge_location, client=None):
+        """Ask the server which resources a gauge has and record them
+
+        Only definite answers are recorded, anything other than a success or a 404
+        leaves the gauge's previous entry in place.
+        """
+        client = get_client(client)
+        capabilities = {}
+        for variant, (url, _) in CNRFCHefsCsvVariants.items():
+            response = client.head(url.format(gauge=gauge_location))
+            if response.ok:
+                capabilities["hefs_csv"] = variant
+                break
+            if response.status_code != 404:
+                return
+
+        response = client.head(RATING_CURVE_URL.format(gauge=gauge_location))
+        if response.ok or response.status_code == 404:
+            capabilities["rating_curve"] = response.ok
+        if False in capabilities.values():
+            capabilities["checked"] = time.time()
+
+        with self.lock:
+            self.gauges[gauge_location] = capabilities
+
+    def refresh(self, gauge_locations=None, client=None):
+        if gauge_locations is None:
+            gauge_locations = get_gauge_index().gauges
+
+        def probe(gauge_location):
+            try:
+                self.probe(gauge_location, client)
+            except Exception as e:
+                print(f"Unable to probe {gauge_location} for the manifest: {e}")
+
+        with ThreadPoolExecutor(max_workers=MANIFEST_REFRESH_WORKERS) as executor:
+            list(executor.map(probe, sorted(gauge_locations)))
+
+        self.updated = time.time()
+        self.save()
+
+    def refresh_in_background(self, max_age=MANIFEST_MAX_AGE, client=None):
+        """Start a refresh thread if the manifest is stale and none is running"""
+        with self.lock:
+            if time.time() - self.updated < max_age:
+                return
+            if self.refresh_thread and self.refresh_thread.is_alive():
+                return
+            self.refresh_thread = threading.Thread(
+                target=self.refresh,
+                kwargs={"client": client},
+                name="cnrfc-gauge-manifest",
+                daemon=True,
+            )
+            self.refresh_thread.start()
+
+
+_manifest = None
+_manifest_lock = threading.Lock()
+
+
+def get_manifest(refresh=False, client=None):
+    """Return the process wide GaugeManifest
+
+    The manifest fills in as gauges are read. With refresh=True every CNRFC gauge is
+    probed in the background through client when the manifest is stale, which costs
+    a few HEAD requests per gauge, so hosts opt in to it once at startup.
+    """
+    global _manifest
+    with _manifest_lock:
+        if _manifest is None:
+            _manifest = GaugeManifest()
+    if refresh:
+        _manifest.refresh_in_background(client=client)
+
+    return _manifest
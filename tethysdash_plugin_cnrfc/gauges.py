@@ -0,0 +1,207 @@
+import hashlib
+import json
+import os
+import threading
+from bisect import bisect_left, bisect_right
+from types import MappingProxyType
+from .constants import CNRFCGauges
+
+# name the gauge selector options are published under for hosts that serve them once
+GAUGE_OPTION_SET = "cnrfc_gauges"
+
+
+class GaugeIndex:
+    """Read only lookups over the gauge selector options of CNRFCGauges
+
+    Every gauge id maps to its label, its basin group and its (group, option)
+    position in the selector, and every basin group maps to its gauge ids. A gauge
+    listed more than once keeps its first listing; the repeats, and options with no
+    value, are collected in duplicates and missing rather than silently dropped.
+    """
+
+    def __init__(self, groups=CNRFCGauges):
+        labels = {}
+        gauge_groups = {}
+        positions = {}
+        group_gauges = {}
+        duplicates = {}
+        missing = []
+        for group_position, group in enumerate(groups):
+            group_label = group["label"]
+            gauges_of_group = group_gauges.setdefault(group_label, [])
+            for option_position, option in enumerate(group["options"]):
+                gauge = option.get("value")
+                position = (group_position, option_position)
+                if not gauge:
+                    missing.append((position, option.get("label")))
+                    continue
+                if gauge in labels:
+                    first_listing = (positions[gauge], labels[gauge])
+                    duplicates.setdefault(gauge, [first_listing])
+                    duplicates[gauge].append((position, option["label"]))
+                else:
+                    labels[gauge] = option["label"]
+                    gauge_groups[gauge] = group_label
+                    positions[gauge] = position
+                if gauge not in gauges_of_group:
+                    gauges_of_group.append(gauge)
+
+        self.labels = MappingProxyType(labels)
+        self.groups = MappingProxyType(gauge_groups)
+        self.positions = MappingProxyType(positions)
+        self.group_gauges = MappingProxyType(
+            {label: tuple(gauges) for label, gauges in group_gauges.items()}
+        )
+        self.duplicates = MappingProxyType(
+            {gauge: tuple(found) for gauge, found in duplicates.items()}
+        )
+        self.missing = tuple(missing)
+        self.gauges = tuple(labels)
+        # changes whenever the selector options do, so clients can cache them by it
+        self.options_hash = hashlib.sha256(
+            json.dumps(groups, sort_keys=True, separators=(",", ":")).encode()
+        ).hexdigest()[:16]
+
+        # prefix search bisects the sorted lowercase ids, substring search runs one
+        # str.find over all the lowercase labels joined by newlines
+        self._sorted_ids = sorted((gauge.lower(), gauge) for gauge in self.gauges)
+        self._sorted_keys = [key for key, _ in self._sorted_ids]
+        self._search_text = "\n".join(label.lower() for label in labels.values())
+        self._label_starts = []
+        start = 0
+        for label in labels.values():
+            self._label_starts.append(start)
+            start += len(label) + 1
+
+    def __contains__(self, gauge):
+        return gauge in self.labels
+
+    def __iter__(self):
+        return iter(self.gauges)
+
+    def __len__(self):
+        return len(self.gauges)
+
+    def label(self, gauge):
+        return self.labels.get(gauge)
+
+    def group(self, gauge):
+        return self.groups.get(gauge)
+
+    def position(self, gauge):
+        return self.positions.get(gauge)
+
+    def gauges_in_group(self, group_label):
+        return self.group_gauges.get(group_label, ())
+
+    def validate(self):
+        """Describe each duplicate or missing value in the selector options"""
+        problems = []
+        for gauge, found in self.duplicates.items():
+            listings = ", ".join(f"{label!r} at {where}" for where, label in found)
+            problems.append(f"{gauge} is listed {len(found)} times: {listings}")
+        for position, label in self.missing:
+            problems.append(f"option {position} ({label}) has no value")
+
+        return problems
+
+    def check(self, gauge_location):
+        """Return the gauge id of gauge_location, raising ValueError if it has none
+
+        Typed ids are accepted in any case and with surrounding whitespace.
+        """
+        if gauge_location in self.labels:
+            return gauge_location
+        gauge = str(gauge_location).strip().upper()
+        if gauge not in self.labels:
+            raise ValueError(f"{gauge_location!r} is not a CNRFC gauge location")
+
+        return gauge
+
+    def expand(self, names):
+        """Turn gauge ids and basin group labels into a list of unique gauge ids"""
+        gauges = []
+        for name in names:
+            if name in self.group_gauges:
+                gauges.extend(self.group_gauges[name])
+            else:
+                gauges.append(self.check(name))
+
+        return list(dict.fromkeys(gauges))
+
+    def search_prefix(self, prefix):
+        """Return the gauges whose id starts with prefix, case insensitively"""
+        prefix = prefix.lower()
+        start = bisect_left(self._sorted_keys, prefix)
+        end = bisect_right(self._sorted_keys, prefix + "\uffff", start)
+
+        return [gauge for _, gauge in self._sorted_ids[start:end]]
+
+    def search(self, text, limit=None):
+        """Return the gauges whose id or label contains text, in selector order
+
+        Gauges whose id starts with text come first.
+        """
+        text = text.lower()
+        if not text or "\n" in text:
+            return []
+        found = dict.fromkeys(self.search_prefix(text))
+        position = self._search_text.find(text)
+        while position >= 0 and (limit is None or len(found) < limit):
+            label_position = bisect_right(self._label_starts, position) - 1
+            found[self.gauges[label_position]] = None
+            next_label = label_position + 1
+            if next_label == len(self.gauges):
+                break
+            position = self._search_text.find(text, self._label_starts[next_label])
+        gauges = list(found)
+
+        return gauges if limit is None else gauges[:limit]
+
+
+_gauge_index = None
+_gauge_index_lock = threading.Lock()
+
+
+def get_gauge_index():
+    """Return the process wide GaugeIndex of CNRFCGauges, building it on first use"""
+    global _gauge_index
+    with _gauge_index_lock:
+        if _gauge_index is None:
+            _gauge_index = GaugeIndex()
+
+    return _gauge_index
+
+
+def get_gauge_option_set():
+    """Return the gauge selector options with their name and content hash"""
+    gauge_index = get_gauge_index()
+    return {
+        "name": GAUGE_OPTION_SET,
+        "hash": gauge_index.options_hash,
+        "options": CNRFCGauges,
+    }
+
+
+def gauge_location_argument():
+    """Return the gauge_location argument definition the gauge drivers share
+
+    It is the CNRFCGauges selector options unless the TETHYSDASH_CNRFC_GAUGE_ARGUMENT
+    environment variable says otherwise. "option_set" is for hosts that serve the
+    options once from get_gauge_option_set: every driver then only refers to them by
+    name and content hash. "text" asks for a gauge id typed as text instead, and the
+    cnrfc_gauge_lookup driver finds gauge ids by name for that case.
+    """
+    gauge_argument = os.environ.get("TETHYSDASH_CNRFC_GAUGE_ARGUMENT")
+    if gauge_argument == "text":
+        return "text"
+    if gauge_argument == "option_set":
+        return {
+            "option_set": GAUGE_OPTION_SET,
+            "hash": get_gauge_index().options_hash,
+        }
+
+    return CNRFCGauges
+
+
+GAUGE_LOCATION_ARGUMENT = gauge_location_argument()
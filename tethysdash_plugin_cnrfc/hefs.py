@@ -1,17 +1,158 @@
-import requests
-import hjson
+import html
 import re
-from datetime import datetime
-from bs4 import BeautifulSoup
-import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+from io import StringIO
 from intake.source import base
 from .utilities import (
-    interpolate_stage_from_rating_curve,
-    interpolate_flow_from_rating_curve,
+    decimation_indices,
+    encode_typed_array,
+    ensemble_statistics,
     get_proper_name,
     get_nwps_location_metadata,
 )
-from .constants import CNRFCGauges
+from .rating_curves import get_rating_curve
+from .rvf import RVF_CALLS, iter_rvf_data
+from .http_client import get_client
+from .gauge_manifest import get_manifest
+from .memo import ensemble_cache, figure_cache
+from .constants import CNRFCHefsCsvVariants
+from .gauges import GAUGE_LOCATION_ARGUMENT, get_gauge_index
+from .lazy import lazy_import
+
+bs4 = lazy_import("bs4")
+hjson = lazy_import("hjson")
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+# number of upstream requests a single HEFS read issues at the same time
+HEFS_FETCH_WORKERS = 3
+# ensemble percentiles drawn as lines by default and the ones the bands are built from
+HEFS_PERCENTILES = (0, 0.05, 0.25, 0.4, 0.6, 0.75, 0.95, 1)
+HEFS_BAND_PERCENTILES = (0, 0.05, 0.25, 0.4, 0.6, 0.75, 0.95, 1)
+# hourly forecast points the chart is zoomed to when it opens
+HEFS_ZOOM_POINTS = 240
+# bytes of the HEFS page read at a time while looking for the issuance time
+HEFS_PAGE_CHUNK_SIZE = 8 * 1024
+
+# characters of the river forecast page decoded and scanned at a time
+RVF_PAGE_CHUNK_SIZE = 16 * 1024
+
+_issuance_time_marker = b"Issuance Time: "
+_issuance_time_row_pattern = re.compile(r"(Issuance Time: .*?<\/tr>)")
+_table_cell_pattern = re.compile(r"<td[^>]*>([^<]*)")
+
+
+def optional_count(name, value, minimum):
+    """Return value as a whole number of at least minimum, or None if it is not set
+
+    Dashboard number arguments can arrive as text, and as "" when left empty.
+    """
+    if value is None or value == "":
+        return None
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        number = float("nan")
+    if not number.is_integer() or number < minimum:
+        raise ValueError(
+            f"{name} must be a whole number of at least {minimum}, not {value!r}"
+        )
+
+    return int(number)
+
+
+def optional_fractions(name, value, default):
+    """Return value as sorted fractions between 0 and 1, or default if it is not set
+
+    Dashboard text arguments list the fractions separated by commas or spaces, and
+    arrive as "" when left empty.
+    """
+    if value is None or value == "":
+        return tuple(default)
+    numbers = value.replace(",", " ").split() if isinstance(value, str) else value
+    try:
+        fractions = tuple(sorted(float(number) for number in numbers))
+    except (TypeError, ValueError):
+        fractions = ()
+    if not fractions or not all(0 <= fraction <= 1 for fraction in fractions):
+        raise ValueError(f"{name} must be fractions between 0 and 1, not {value!r}")
+
+    return fractions
+
+
+def read_hefs_csv(hefs_csv, unit, dtype="float64", nrows=None):
+    """Parse a HEFS ensemble csv into its dates and a (time, member) matrix
+
+    The units row is skipped while parsing and the members are read straight into
+    one float block, so the matrix is a view of the parsed frame rather than a copy.
+    Flows are given in kcfs and are scaled to cfs in place. With nrows only the first
+    nrows time steps are parsed.
+    """
+    columns = hefs_csv[: hefs_csv.index("\n")].count(",") + 1
+    df = pd.read_csv(
+        StringIO(hefs_csv),
+        header=None,
+        skiprows=2,
+        index_col=0,
+        dtype={column: dtype for column in range(1, columns)},
+        float_precision="round_trip",
+        nrows=nrows,
+    )
+    matrix = df.to_numpy()
+    if unit == "cfs":
+        matrix *= 1000
+
+    return df.index.tolist(), matrix
+
+
+def compact_ensemble_member_series(dates, ensembles, binary=False):
+    """Pack every ensemble member into a single scatter trace
+
+    The members follow one another in the trace separated by a gap so the lines
+    are not joined. The dates are given as epoch milliseconds, which plotly reads
+    the same way as the UTC date strings but which take far less space when they
+    are repeated for every member. With binary the arrays are typed arrays.
+    """
+    rows, members = ensembles.shape
+    milliseconds = (
+        pd.to_datetime(dates).to_numpy(dtype="datetime64[ms]").astype(np.int64)
+    )
+    if binary:
+        x = np.full((members, rows + 1), np.nan)
+        x[:, :rows] = milliseconds
+        y = np.full((members, rows + 1), np.nan, dtype=np.float32)
+        y[:, :rows] = ensembles.T
+        x = encode_typed_array(x.ravel(), "f8")
+        y = encode_typed_array(y.ravel(), "f4")
+    else:
+        x = np.empty((members, rows + 1), dtype=object)
+        x[:, :rows] = milliseconds
+        x[:, rows] = None
+        y = np.empty((members, rows + 1), dtype=object)
+        y[:, :rows] = ensembles.T
+        y[:, rows] = None
+        x = x.ravel().tolist()
+        y = y.ravel().tolist()
+
+    return dict(
+        type="scatter",
+        mode="lines",
+        name="Ensembles",
+        x=x,
+        y=y,
+        line={
+            "color": "gray",
+        },
+        legendgroup="ensembles",
+        showlegend=True,
+        hoverinfo=None,
+        visible="legendonly",
+    )
+
+
+def get_batch_workers(client=None):
+    """Return how many gauges fit their fetches in the connection pool of client"""
+    return max(1, get_client(client).max_connections // HEFS_FETCH_WORKERS)
 
 
 class HEFS(base.DataSource):
@@ -29,18 +170,56 @@ class HEFS(base.DataSource):
     ]
     visualization_description = "An interactive chart that depicts the forecasted deterministic and ensemble streamflows. Rain and snow melt values can also be plotted with the streamflows. More information can be found at https://www.cnrfc.noaa.gov/ensembleProduct.php"
     visualization_args = {
-        "gauge_location": CNRFCGauges,
+        "gauge_location": GAUGE_LOCATION_ARGUMENT,
         "include_rain_melt_plot": "checkbox",
+        "include_ensemble_members": "checkbox",
+        "compact_ensemble_members": "checkbox",
+        "percentiles": "text",
+        "horizon_hours": "number",
+        "history_hours": "number",
+        "max_points": "number",
+        "full_resolution_window": "checkbox",
+        "binary_arrays": "checkbox",
+        "binary_dates": "checkbox",
     }
     visualization_group = "CNRFC"
     visualization_label = "HEFS"
     visualization_type = "plotly"
     visualization_attribution = "CNRFC"
+    # the HTTPClient used for upstream requests, None uses the shared client
+    http_client = None
 
-    def __init__(self, gauge_location, include_rain_melt_plot, metadata=None):
+    def __init__(
+        self,
+        gauge_location,
+        include_rain_melt_plot=False,
+        include_ensemble_members=False,
+        percentiles=HEFS_PERCENTILES,
+        compact_ensemble_members=False,
+        binary_arrays=False,
+        binary_dates=False,
+        max_points=None,
+        full_resolution_window=False,
+        horizon_hours=None,
+        history_hours=None,
+        metadata=None,
+    ):
         # store important kwargs
-        self.gauge_location = gauge_location
+        self.gauge_location = get_gauge_index().check(gauge_location)
         self.include_rain_melt_plot = include_rain_melt_plot
+        self.include_ensemble_members = include_ensemble_members
+        self.percentiles = optional_fractions(
+            "percentiles", percentiles, HEFS_PERCENTILES
+        )
+        self.compact_ensemble_members = compact_ensemble_members
+        self.binary_arrays = binary_arrays
+        self.binary_dates = binary_dates
+        self.max_points = optional_count("max_points", max_points, 1)
+        self.full_resolution_window = full_resolution_window
+        self.horizon_hours = optional_count("horizon_hours", horizon_hours, 1)
+        self.history_hours = optional_count("history_hours", history_hours, 0)
+        self.valid_time_min = None
+        self.valid_time_max = None
         self.data_groups = {}
         self.ymarkers = {}
         self.title = ""
@@ -60,10 +239,73 @@ class HEFS(base.DataSource):
 
     def read(self):
         """Return a version of the xarray with all the data in memory"""
-        self.get_cnrfc_hefs_data()
+        # the issuance time is cheap to look up and changes whenever the forecast
+        # does, so a figure already built for it can be returned as is
+        hefs_metadata = self.get_hefs_metadata(self.fetch_hefs_page())
+        cache_key = self.get_figure_cache_key(hefs_metadata["issuance_time"])
+        figure = figure_cache.get(cache_key)
+        if figure is not None:
+            print(f"Using cached HEFS figure for {self.gauge_location}")
+            return figure
+
+        self.get_cnrfc_hefs_data(hefs_metadata)
         self.get_config()
         self.get_layout()
-        return {"data": self.plot_series, "layout": self.layout, "config": self.config}
+        figure = {
+            "data": self.plot_series,
+            "layout": self.layout,
+            "config": self.config,
+        }
+        figure_cache.put(cache_key, figure)
+
+        return figure
+
+    @classmethod
+    def read_many(cls, gauge_locations, max_workers=None, **kwargs):
+        """Read the figures of several gauges at once
+
+        gauge_locations may mix gauge ids and basin group labels, which stand for
+        every gauge of the group. kwargs are the driver arguments every gauge is
+        read with, such as include_rain_melt_plot, which is off unless given.
+        Gauges are read by at most max_workers threads sharing the process wide
+        HTTP client, by default as many as get_batch_workers fits in its connection
+        pool. Returns a dict mapping each gauge to its figure, or to the exception
+        its read raised so that one failing gauge does not cost the others their
+        figures.
+        """
+        sources = {
+            gauge_location: cls(gauge_location, **kwargs)
+            for gauge_location in get_gauge_index().expand(gauge_locations)
+        }
+
+        def read(gauge_location):
+            try:
+                return sources[gauge_location].read()
+            except Exception as e:
+                print(f"Unable to read HEFS data for {gauge_location}: {e}")
+                return e
+
+        max_workers = max_workers or get_batch_workers()
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            figures = executor.map(read, sources)
+
+            return dict(zip(sources, figures))
+
+    def get_figure_cache_key(self, issuance_time):
+        return (
+            self.gauge_location,
+            bool(self.include_rain_melt_plot),
+            bool(self.include_ensemble_members),
+            self.percentiles,
+            bool(self.compact_ensemble_members),
+            bool(self.binary_arrays),
+            bool(self.binary_dates),
+            self.max_points,
+            bool(self.full_resolution_window),
+            self.horizon_hours,
+            self.history_hours,
+            issuance_time,
+        )
 
     def get_config(self):
         self.config = dict(
@@ -157,136 +399,288 @@ class HEFS(base.DataSource):
 
         return
 
-    def get_cnrfc_hefs_data(self):
-        rating_curve_flows, rating_curve_stages = self.get_location_rating_curve()
-        self.get_hefs_data(rating_curve_flows, rating_curve_stages)
+    def encode_values(self, values):
+        if self.binary_arrays:
+            return encode_typed_array(values, "f4")
+        if isinstance(values, np.ndarray):
+            return values.tolist()
 
-        hefs_metadata = self.get_hefs_metadata()
+        return values
 
-        print(f"Getting river forecast plot data for {self.gauge_location}")
-        river_forecast_plot_web = f"https://www.cnrfc.noaa.gov/graphicalRVF_printer.php?id={self.gauge_location}&scale=1"  # noqa:E501
-        response = requests.get(river_forecast_plot_web)
+    def encode_dates(self, dates):
+        if self.binary_dates:
+            milliseconds = pd.to_datetime(dates).to_numpy(dtype="datetime64[ms]")
+            return encode_typed_array(milliseconds.astype(np.int64), "f8")
 
-        self.get_hydro_data(response.text)
+        return dates
 
-        self.get_hydro_thresholds(
-            rating_curve_flows, rating_curve_stages, response.text
-        )
+    def get_cnrfc_hefs_data(self, hefs_metadata):
+        # none of the upstream resources depend on each other, so fetch them all
+        # at once and only start parsing when every response is in
+        with ThreadPoolExecutor(max_workers=HEFS_FETCH_WORKERS) as executor:
+            rating_curve_future = executor.submit(self.get_location_rating_curve)
+            ensembles_future = executor.submit(
+                self.get_ensembles, hefs_metadata["issuance_time"]
+            )
+            rvf_data_future = executor.submit(self.fetch_river_forecast_page)
+
+            rating_curve = rating_curve_future.result()
+            unit, dates, ensembles = ensembles_future.result()
+            rvf_data = rvf_data_future.result()
+
+        self.set_time_window(dates)
+
+        self.get_hefs_data(rating_curve, unit, dates, ensembles)
+
+        self.get_hydro_data(rvf_data["series"])
+
+        self.get_hydro_thresholds(rating_curve, rvf_data["thresholds"])
 
         if self.include_rain_melt_plot:
-            self.get_forcing_data(response.text)
+            self.get_forcing_data(rvf_data["forcing"])
 
         location_proper_name = get_proper_name(self.gauge_location)
         self.title = f"Hourly River Level Probabilities<br>{location_proper_name}<br><b>Issuance Time</b>: {hefs_metadata['issuance_time']}"  # noqa: E501
 
         return
 
-    def get_hefs_data(self, rating_curve_flows, rating_curve_stages):
+    def get_ensembles(self, issuance_time):
+        """Return the unit, dates and member matrix of the gauge's HEFS forecast
+
+        Only the first horizon_hours hourly time steps are parsed when it is set. The
+        parsed matrix is shared through ensemble_cache by every read of the same
+        forecast, so it is marked read only.
+        """
+        cache_key = (self.gauge_location, issuance_time, self.horizon_hours)
+        ensembles = ensemble_cache.get(cache_key)
+        if ensembles is not None:
+            return ensembles
+
+        unit, hefs_csv = self.fetch_hefs_csv()
+        dates, matrix = read_hefs_csv(hefs_csv, unit, nrows=self.horizon_hours)
+        matrix.flags.writeable = False
+        ensembles = (unit, dates, matrix)
+        ensemble_cache.put(cache_key, ensembles)
+
+        return ensembles
+
+    def set_time_window(self, dates):
+        """Work out which observed and forecast points fall inside the window
+
+        The window runs from history_hours before the first HEFS time step to the
+        last one read, as UTC epoch milliseconds matching the x values of the river
+        forecast page. A bound is left as None when its argument is not set.
+        """
+        forecast_start = np.datetime64(dates[0], "ms").astype(np.int64)
+        forecast_end = np.datetime64(dates[-1], "ms").astype(np.int64)
+        if self.history_hours is not None:
+            self.valid_time_min = forecast_start - self.history_hours * 3600 * 1000
+        if self.horizon_hours is not None:
+            self.valid_time_max = forecast_end
+
+        return
+
+    def get_time_window_indices(self, milliseconds):
+        """Return the indices of the epoch milliseconds inside the time window"""
+        inside = np.ones(len(milliseconds), dtype=bool)
+        if self.valid_time_min is not None:
+            inside &= milliseconds >= self.valid_time_min
+        if self.valid_time_max is not None:
+            inside &= milliseconds <= self.valid_time_max
+
+        return np.flatnonzero(inside)
+
+    def fetch_hefs_csv(self):
         print(f"Getting HEFS plot data for {self.gauge_location}")
+        manifest = get_manifest()
+        known_variant = manifest.get(self.gauge_location).get("hefs_csv")
+        for variant in manifest.hefs_csv_variants(self.gauge_location):
+            hefs_csv_url, unit = CNRFCHefsCsvVariants[variant]
+            response = get_client(self.http_client).get(
+                hefs_csv_url.format(gauge=self.gauge_location)
+            )
+            if response.ok:
+                manifest.record(self.gauge_location, hefs_csv=variant)
+                return unit, response.text
+
+            if variant == known_variant:
+                print(f"--> Cached {variant} csv for {self.gauge_location} failed")
+                manifest.invalidate(self.gauge_location)
+
+        response.raise_for_status()
+
+    def fetch_hefs_page(self):
+        """Return the HEFS page up to the end of its issuance time row
+
+        The page is streamed and the connection is closed as soon as the row has
+        arrived, so the rest of the page is never downloaded.
+        """
+        print(f"Getting HEFS metadata for {self.gauge_location}")
+        hefs_plot_web = (
+            f"https://www.cnrfc.noaa.gov/ensembleProduct.php?id={self.gauge_location}"
+        )
+        response = get_client(self.http_client).get(hefs_plot_web, stream=True)
+        page = bytearray()
+        row_start = -1
         try:
-            unit = "feet"
-            hefs_csv_url = f"https://www.cnrfc.noaa.gov/csv/{self.gauge_location}_hefs_csv_hourly_sstg.csv"  # noqa:E501
-            df = pd.read_csv(hefs_csv_url)
-        except Exception:
-            unit = "cfs"
-            hefs_csv_url = f"https://www.cnrfc.noaa.gov/csv/{self.gauge_location}_hefs_csv_hourly.csv"  # noqa:E501
-            df = pd.read_csv(hefs_csv_url)
-        df = df.drop(0)
-        df = df.set_index("GMT")
-        df = df.astype(float)
-        if unit == "cfs":
-            df = df * 1000
-        ens_columns = [f"Ensemble {i}" for i in range(len(df.columns))]
-        df.columns = ens_columns
-        df_stats = df.T.quantile([0, 0.05, 0.25, 0.4, 0.6, 0.75, 0.95, 1]).T
-        df_stats["mean"] = df.T.mean()
-        df = df.merge(df_stats, how="left", left_index=True, right_index=True)
-        dates = df.index.tolist()
+            for chunk in response.iter_content(HEFS_PAGE_CHUNK_SIZE):
+                # markers can be split across chunks, so look back a little
+                searched = max(len(page) - len(_issuance_time_marker), 0)
+                page += chunk
+                if row_start < 0:
+                    row_start = page.find(_issuance_time_marker, searched)
+                if row_start >= 0 and page.find(b"</tr>", max(row_start, searched)) > 0:
+                    break
+        finally:
+            response.close()
+
+        return page.decode(response.encoding or "utf-8", errors="replace")
+
+    def fetch_river_forecast_page(self):
+        """Download the river forecast page, parsing its charts as they arrive
+
+        Returns a dict mapping each rvf.RVF_CALLS name to the parsed payloads of
+        those calls in page order. Payloads are parsed as the page arrives, so
+        parsing overlaps the rest of the download. Rain and melt payloads are
+        skipped unless they are plotted.
+        """
+        print(f"Getting river forecast plot data for {self.gauge_location}")
+        river_forecast_plot_web = f"https://www.cnrfc.noaa.gov/graphicalRVF_printer.php?id={self.gauge_location}&scale=1"  # noqa:E501
+        response = get_client(self.http_client).get(
+            river_forecast_plot_web, stream=True
+        )
+        if response.encoding is None:
+            response.encoding = "utf-8"
+
+        rvf_data = {name: [] for name in RVF_CALLS.values()}
+        names = [name for name in rvf_data if name != "forcing"]
+        if self.include_rain_melt_plot:
+            names.append("forcing")
+        try:
+            chunks = response.iter_content(RVF_PAGE_CHUNK_SIZE, decode_unicode=True)
+            for name, payload in iter_rvf_data(chunks, names):
+                rvf_data[name].append(payload)
+        finally:
+            response.close()
+
+        return rvf_data
+
+    def get_decimation_indices(self, lower, upper, window):
+        """Return the indices of the points to plot, or None to plot every point
+
+        When max_points is set a trace is reduced to about that many points,
+        keeping the peaks and troughs between lower and upper. With
+        full_resolution_window the first window points, the part of the trace the
+        chart opens zoomed to, are all kept and only the rest is reduced.
+        """
+        if not self.max_points:
+            return None
+        if not self.full_resolution_window:
+            window = 0
+
+        return decimation_indices(lower, upper, self.max_points, window)
+
+    def get_hefs_data(self, rating_curve, unit, dates, ensembles):
+        percentiles = sorted(set(HEFS_BAND_PERCENTILES) | set(self.percentiles))
+        stats = ensemble_statistics(ensembles, percentiles)
+        # rating curves are monotonic, so the statistics of the converted members are
+        # the converted statistics and only those need to go through the curve
         if unit == "cfs":
-            df_flow = df
-            df_stage = df.map(
-                lambda x: interpolate_stage_from_rating_curve(
-                    rating_curve_stages, rating_curve_flows, x
-                )
-            )
-            df_flow = df_flow.reset_index()
-            df_stage = df_stage.reset_index()
+            flows = stats
+            stages = rating_curve.stage_from_flow(stats)
         else:
-            df_stage = df
-            df_flow = df.map(
-                lambda x: interpolate_flow_from_rating_curve(
-                    rating_curve_stages, rating_curve_flows, x
-                )
-            )
-            df_flow = df_flow.reset_index()
-            df_stage = df_stage.reset_index()
-        del df
+            stages = stats
+            flows = rating_curve.flow_from_stage(stats)
 
-        for ens in ens_columns:
-            self.plot_series.append(
-                dict(
-                    type="scatter",
-                    mode="lines",
-                    name="Ensembles",
-                    x=dates,
-                    y=df_stage[ens].tolist(),
-                    line={
-                        "color": "gray",
-                    },
-                    legendgroup="ensembles",
-                    showlegend=True if ens == "Ensemble 1" else False,
-                    hoverinfo=None,
-                    visible="legendonly",
-                )
-            )
+        stage_stats = dict(zip(percentiles, stages.T))
+        stage_stats["mean"] = stages[:, -1]
+        flow_stats = dict(zip(percentiles, flows.T))
+        flow_stats["mean"] = flows[:, -1]
+
+        if self.include_ensemble_members:
+            self.get_ensemble_member_series(rating_curve, unit, dates, ensembles)
+
+        self.range_ymin = (
+            stage_stats[0].min() if len(dates) <= 240 else stage_stats[0][:239].min()
+        )
+        self.range_ymax = (
+            stage_stats[1].max() if len(dates) <= 240 else stage_stats[1][:239].max()
+        )
+        self.range_xmax = dates[-1] if len(dates) <= 240 else dates[239]
+
+        # every band and line shares one index set picked from the ensemble envelope
+        # so the bands still meet once the points are thinned out
+        indices = self.get_decimation_indices(
+            stats[:, 0], stats[:, len(percentiles) - 1], HEFS_ZOOM_POINTS
+        )
+        if indices is not None:
+            dates = [dates[index] for index in indices]
+            stage_stats = {key: values[indices] for key, values in stage_stats.items()}
+            flow_stats = {key: values[indices] for key, values in flow_stats.items()}
 
+        series_dates = self.encode_dates(dates)
+        band_dates = self.encode_dates(dates + dates[::-1])
         hourly_probabilities = [
             {
                 "title": "0-5% chance",
-                "x": dates + dates[::-1],
-                "y": pd.concat([df_stage[0.05], df_stage[0][::-1]]).tolist(),
+                "x": band_dates,
+                "y": self.encode_values(
+                    np.concatenate([stage_stats[0.05], stage_stats[0][::-1]])
+                ),
                 "color": "lightgray",
                 "showlegend": True,
             },
             {
                 "title": "0-5% chance",
-                "x": dates + dates[::-1],
-                "y": pd.concat([df_stage[1], df_stage[0.95][::-1]]).tolist(),
+                "x": band_dates,
+                "y": self.encode_values(
+                    np.concatenate([stage_stats[1], stage_stats[0.95][::-1]])
+                ),
                 "color": "lightgray",
                 "showlegend": False,
             },
             {
                 "title": "5-25% chance",
-                "x": dates + dates[::-1],
-                "y": pd.concat([df_stage[0.95], df_stage[0.75][::-1]]).tolist(),
+                "x": band_dates,
+                "y": self.encode_values(
+                    np.concatenate([stage_stats[0.95], stage_stats[0.75][::-1]])
+                ),
                 "color": "#B6BEFC",
                 "showlegend": True,
             },
             {
                 "title": "5-25% chance",
-                "x": dates + dates[::-1],
-                "y": pd.concat([df_stage[0.25], df_stage[0.05][::-1]]).tolist(),
+                "x": band_dates,
+                "y": self.encode_values(
+                    np.concatenate([stage_stats[0.25], stage_stats[0.05][::-1]])
+                ),
                 "color": "#B6BEFC",
                 "showlegend": False,
             },
             {
                 "title": "25-40% chance",
-                "x": dates + dates[::-1],
-                "y": pd.concat([df_stage[0.75], df_stage[0.6][::-1]]).tolist(),
+                "x": band_dates,
+                "y": self.encode_values(
+                    np.concatenate([stage_stats[0.75], stage_stats[0.6][::-1]])
+                ),
                 "color": "#FBFBCF",
                 "showlegend": True,
             },
             {
                 "title": "25-40% chance",
-                "x": dates + dates[::-1],
-                "y": pd.concat([df_stage[0.4], df_stage[0.25][::-1]]).tolist(),
+                "x": band_dates,
+                "y": self.encode_values(
+                    np.concatenate([stage_stats[0.4], stage_stats[0.25][::-1]])
+                ),
                 "color": "#FBFBCF",
                 "showlegend": False,
             },
             {
                 "title": "40-60% chance",
-                "x": dates + dates[::-1],
-                "y": pd.concat([df_stage[0.6], df_stage[0.4][::-1]]).tolist(),
+                "x": band_dates,
+                "y": self.encode_values(
+                    np.concatenate([stage_stats[0.6], stage_stats[0.4][::-1]])
+                ),
                 "color": "#F7EBA7",
                 "showlegend": True,
             },
@@ -315,89 +709,29 @@ class HEFS(base.DataSource):
                 )
             )
 
-        other_series = [
-            {
-                "title": "Minimum",
-                "x": dates,
-                "y": df_stage[0].tolist(),
-                "text": [
-                    f"<i>Minimum</i>: {round(df_stage.loc[i, 0], 2)} feet ({round(df_flow.loc[i, 0], 2)} cfs)"  # noqa: E501
-                    for i in range(len(dates))
-                ],
-            },
-            {
-                "title": "Maximum",
-                "x": dates,
-                "y": df_stage[1].tolist(),
-                "text": [
-                    f"<i>Maximum</i>: {round(df_stage.loc[i, 1], 2)} feet ({round(df_flow.loc[i, 1], 2)} cfs)"  # noqa: E501
-                    for i in range(len(dates))
-                ],
-            },
-            {
-                "title": "5% Percentile",
-                "x": dates,
-                "y": df_stage[0.05].tolist(),
-                "text": [
-                    f"<i>5%</i>: {round(df_stage.loc[i, .05], 2)} feet ({round(df_flow.loc[i, .05], 2)} cfs)"  # noqa: E501
-                    for i in range(len(dates))
-                ],
-            },
-            {
-                "title": "25% Percentile",
-                "x": dates,
-                "y": df_stage[0.25].tolist(),
-                "text": [
-                    f"<i>25%</i>: {round(df_stage.loc[i, .25], 2)} feet ({round(df_flow.loc[i, .25], 2)} cfs)"  # noqa: E501
-                    for i in range(len(dates))
-                ],
-            },
-            {
-                "title": "40% Percentile",
-                "x": dates,
-                "y": df_stage[0.4].tolist(),
-                "text": [
-                    f"<i>40%</i>: {round(df_stage.loc[i, .4], 2)} feet ({round(df_flow.loc[i, .4], 2)} cfs)"  # noqa: E501
-                    for i in range(len(dates))
-                ],
-            },
-            {
-                "title": "60% Percentile",
-                "x": dates,
-                "y": df_stage[0.6].tolist(),
-                "text": [
-                    f"<i>60%</i>: {round(df_stage.loc[i, .6], 2)} feet ({round(df_flow.loc[i, .6], 2)} cfs)"  # noqa: E501
-                    for i in range(len(dates))
-                ],
-            },
-            {
-                "title": "75% Percentile",
-                "x": dates,
-                "y": df_stage[0.75].tolist(),
-                "text": [
-                    f"<i>75%</i>: {round(df_stage.loc[i, .75], 2)} feet ({round(df_flow.loc[i, .75], 2)} cfs)"  # noqa: E501
-                    for i in range(len(dates))
-                ],
-            },
-            {
-                "title": "95% Percentile",
-                "x": dates,
-                "y": df_stage[0.95].tolist(),
-                "text": [
-                    f"<i>95%</i>: {round(df_stage.loc[i, .95], 2)} feet ({round(df_flow.loc[i, .95], 2)} cfs)"  # noqa: E501
-                    for i in range(len(dates))
-                ],
-            },
-            {
-                "title": "Ensemble Mean",
-                "x": dates,
-                "y": df_stage["mean"].tolist(),
-                "text": [
-                    f"<i>Mean</i>: {round(df_stage.loc[i, 'mean'], 2)} feet ({round(df_flow.loc[i, 'mean'], 2)} cfs)"  # noqa: E501
-                    for i in range(len(dates))
-                ],
-            },
+        other_series = []
+        ordered_percentiles = [p for p in (0, 1) if p in self.percentiles] + [
+            p for p in self.percentiles if p not in (0, 1)
         ]
+        for percentile in ordered_percentiles:
+            if percentile == 0:
+                title, label = "Minimum", "Minimum"
+            elif percentile == 1:
+                title, label = "Maximum", "Maximum"
+            else:
+                label = f"{percentile * 100:g}%"
+                title = f"{label} Percentile"
+            other_series.append({"title": title, "label": label, "column": percentile})
+        other_series.append(
+            {"title": "Ensemble Mean", "label": "Mean", "column": "mean"}
+        )
+
+        for series in other_series:
+            stage = stage_stats[series["column"]]
+            flow = flow_stats[series["column"]]
+            series["x"] = series_dates
+            series["y"] = self.encode_values(stage)
+            series["customdata"] = self.encode_values(flow)
 
         for series in other_series:
             self.plot_series.append(
@@ -414,65 +748,84 @@ class HEFS(base.DataSource):
                         "width": 2 if series["title"] == "Ensemble Mean" else 0,
                     },
                     showlegend=True if series["title"] == "Ensemble Mean" else False,
-                    text=series["text"],
-                    hovertemplate="%{text} <extra></extra>",
+                    customdata=series["customdata"],
+                    hovertemplate=f"<i>{series['label']}</i>: %{{y:.2~f}} feet (%{{customdata:.2~f}} cfs) <extra></extra>",  # noqa: E501
                 )
             )
 
-        self.range_ymin = (
-            min(df_stage[0]) if len(df_stage[0]) <= 240 else min(df_stage[0][:239])
-        )
-        self.range_ymax = (
-            max(df_stage[1]) if len(df_stage[1]) <= 240 else max(df_stage[1][:239])
+        return
+
+    def get_ensemble_member_series(self, rating_curve, unit, dates, ensembles):
+        indices = self.get_decimation_indices(
+            np.fmin.reduce(ensembles, axis=1),
+            np.fmax.reduce(ensembles, axis=1),
+            HEFS_ZOOM_POINTS,
         )
-        self.range_xmax = dates[-1] if len(dates) <= 240 else dates[239]
+        if indices is not None:
+            dates = [dates[index] for index in indices]
+            ensembles = ensembles[indices]
+
+        # members are only converted to stage when their traces are built
+        if unit == "cfs":
+            ensembles = rating_curve.stage_from_flow(ensembles)
+
+        if self.compact_ensemble_members:
+            self.plot_series.append(
+                compact_ensemble_member_series(dates, ensembles, self.binary_arrays)
+            )
+            return
+
+        dates = self.encode_dates(dates)
+        for member in range(ensembles.shape[1]):
+            self.plot_series.append(
+                dict(
+                    type="scatter",
+                    mode="lines",
+                    name="Ensembles",
+                    x=dates,
+                    y=self.encode_values(ensembles[:, member]),
+                    line={
+                        "color": "gray",
+                    },
+                    legendgroup="ensembles",
+                    showlegend=True if member == 1 else False,
+                    hoverinfo=None,
+                    visible="legendonly",
+                )
+            )
 
         return
 
-    def get_hefs_metadata(self):
-        print(f"Getting HEFS metadata for {self.gauge_location}")
-        hefs_plot_web = (
-            f"https://www.cnrfc.noaa.gov/ensembleProduct.php?id={self.gauge_location}"
-        )
-        response = requests.get(hefs_plot_web)
-        issuance_time_tag = re.findall(r"(Issuance Time: .*?<\/tr>)", response.text)[0]
+    def get_hefs_metadata(self, hefs_page):
+        issuance_time_tag = _issuance_time_row_pattern.search(hefs_page).group(1)
         issuance_time_tag = issuance_time_tag.split("</td>", 1)[1]
-        soup = BeautifulSoup(issuance_time_tag, "html.parser")
-        issuance_time = soup.td.contents[0]
+        issuance_time_cell = _table_cell_pattern.search(issuance_time_tag)
+        issuance_time = html.unescape(issuance_time_cell.group(1))
 
         return {"issuance_time": issuance_time}
 
-    def get_hydro_data(self, charting_data):
-        chart_series = re.findall(r"chart.addSeries\((.*),false\);", charting_data)
-        all_dates = []
+    def get_hydro_data(self, chart_series):
+        first_time = None
         hydro_ymin = None
         hydro_ymax = None
         observed_forecast_split_dt = None
-        for chart_data in chart_series:
-            chart_data_json = hjson.loads(chart_data)
+        for chart_data_json in chart_series:
             series_name = chart_data_json["name"]
             if not series_name:
                 continue
             print(f"--> Parsing {series_name} data")
-            valid_dates = []
-            valid_values = []
-            valid_texts = []
-            for data in chart_data_json["data"]:
-                valid_date = datetime.fromtimestamp(data["x"] / 1000)
-                valid_dates.append(valid_date.strftime("%Y-%m-%dT%H:%M"))
-                valid_values.append(data["y"])
-
-                if data.get("flow"):
-                    valid_texts.append(
-                        f"<i>{series_name}</i>: {data['y']} feet ({data['flow']} cfs)"
-                    )
-                else:
-                    valid_texts.append(f"<i>{series_name}</i>: {data['y']} feet")
-
-                if valid_date not in all_dates:
-                    all_dates.append(valid_date)
+            points, valid_times = self.get_points_in_time_window(
+                chart_data_json["data"], [data["x"] for data in chart_data_json["data"]]
+            )
+            valid_dates = np.datetime_as_string(valid_times, unit="m").tolist()
+            valid_values = [data["y"] for data in points]
+            valid_flows = [data.get("flow") for data in points]
 
             if valid_values:
+                series_first_time = valid_times.min()
+                if first_time is None or series_first_time < first_time:
+                    first_time = series_first_time
+
                 if "Raw" in series_name:
                     plot_color = "rgb(52, 225, 235)"
                 elif "Simulated" in series_name:
@@ -482,6 +835,31 @@ class HEFS(base.DataSource):
                 else:
                     plot_color = "rgb(255, 102, 255)"
 
+                if not hydro_ymin:
+                    hydro_ymin = min(valid_values)
+                else:
+                    hydro_ymin = min(hydro_ymin, min(valid_values))
+
+                if not hydro_ymax:
+                    hydro_ymax = max(valid_values)
+                else:
+                    hydro_ymax = max(hydro_ymax, max(valid_values))
+
+                if "Observed" in series_name:
+                    observed_forecast_split_dt = valid_dates[-1]
+
+                if self.max_points:
+                    window = np.count_nonzero(
+                        valid_times <= np.datetime64(self.range_xmax, "ms")
+                    )
+                    indices = self.get_decimation_indices(
+                        valid_values, valid_values, window
+                    )
+                    valid_dates = [valid_dates[index] for index in indices]
+                    valid_values = [valid_values[index] for index in indices]
+                    valid_flows = [valid_flows[index] for index in indices]
+
+                hover = self.get_hydro_hover(series_name, valid_values, valid_flows)
                 self.plot_series.append(
                     dict(
                         type="scatter",
@@ -491,30 +869,16 @@ class HEFS(base.DataSource):
                             if "Observed" in series_name
                             else f"Deterministic {series_name}"
                         ),
-                        x=valid_dates,
-                        y=valid_values,
+                        x=self.encode_dates(valid_dates),
+                        y=self.encode_values(valid_values),
                         line={
                             "color": plot_color,
                         },
-                        text=valid_texts,
-                        hovertemplate="%{text} <extra></extra>",
+                        **hover,
                         legendrank=999,
                     )
                 )
 
-                if not hydro_ymin:
-                    hydro_ymin = min(valid_values)
-                else:
-                    hydro_ymin = min(hydro_ymin, min(valid_values))
-
-                if not hydro_ymax:
-                    hydro_ymax = max(valid_values)
-                else:
-                    hydro_ymax = max(hydro_ymax, max(valid_values))
-
-                if "Observed" in series_name:
-                    observed_forecast_split_dt = valid_dates[-1]
-
         self.plot_shapes.append(
             dict(
                 type="line",
@@ -529,25 +893,61 @@ class HEFS(base.DataSource):
             )
         )
 
-        all_dates.sort()
+        # a narrow time window can leave no observed or deterministic points at all
+        if first_time is None:
+            return
 
         self.range_ymin = min(hydro_ymin, self.range_ymin)
         self.range_ymax = max(hydro_ymax, self.range_ymax)
-        self.range_xmin = all_dates[0].strftime("%Y-%m-%d %H:%M:%S")
+        self.range_xmin = np.datetime_as_string(first_time, unit="s").replace("T", " ")
 
         return
 
-    def get_hydro_thresholds(
-        self, rating_curve_flows, rating_curve_stages, charting_data
-    ):
-        for threshold in re.findall(
-            r"chart.yAxis\[0\].addPlotLine\((.*)\);", charting_data
-        ):
-            threshold_json = hjson.loads(threshold)
-            interpolated_flow = interpolate_flow_from_rating_curve(
-                rating_curve_stages, rating_curve_flows, threshold_json["value"]
+    def get_points_in_time_window(self, points, milliseconds):
+        """Drop the points outside the time window
+
+        milliseconds are the UTC epoch times of the points. Returns the remaining
+        points and their times as a datetime64 array.
+        """
+        milliseconds = np.array(milliseconds, dtype=np.int64)
+        if self.valid_time_min is not None or self.valid_time_max is not None:
+            indices = self.get_time_window_indices(milliseconds)
+            points = [points[index] for index in indices]
+            milliseconds = milliseconds[indices]
+
+        return points, milliseconds.astype("datetime64[ms]")
+
+    def get_hydro_hover(self, series_name, values, flows):
+        # a series either carries a flow for every point or for none of them, the
+        # rare mix falls back to writing out the text of each point
+        if all(flows):
+            return dict(
+                customdata=self.encode_values(flows),
+                hovertemplate=f"<i>{series_name}</i>: %{{y:.2~f}} feet (%{{customdata:.2~f}} cfs) <extra></extra>",  # noqa: E501
+            )
+        if not any(flows):
+            return dict(
+                hovertemplate=f"<i>{series_name}</i>: %{{y:.2~f}} feet <extra></extra>"
             )
 
+        return dict(
+            text=[
+                (
+                    f"<i>{series_name}</i>: {value} feet ({flow} cfs)"
+                    if flow
+                    else f"<i>{series_name}</i>: {value} feet"
+                )
+                for value, flow in zip(values, flows)
+            ],
+            hovertemplate="%{text} <extra></extra>",
+        )
+
+    def get_hydro_thresholds(self, rating_curve, thresholds):
+        for threshold_json in thresholds:
+            interpolated_flow = rating_curve.flow_from_stage(
+                threshold_json["value"]
+            ).item()
+
             self.plot_shapes.append(
                 dict(
                     type="line",
@@ -577,30 +977,30 @@ class HEFS(base.DataSource):
 
         return
 
-    def get_forcing_data(self, charting_data):
-        chart_series = re.findall(r"chart2.addSeries\((.*),false\);", charting_data)
+    def get_forcing_data(self, chart_series):
         forcing_series = []
         forcing_ymin = None
         forcing_ymax = None
-        for chart_data in chart_series:
-            chart_data_json = hjson.loads(chart_data)
+        for chart_data_json in chart_series:
             series_name = chart_data_json["name"]
             if not series_name:
                 continue
             print(f"--> Parsing {series_name} data")
-            valid_dates = []
-            valid_values = []
-            for data in chart_data_json["data"]:
-                valid_date = datetime.fromtimestamp(data[0] / 1000)
-                valid_dates.append(valid_date.strftime("%Y-%m-%dT%H"))
-                valid_values.append(float(data[1]))
+            points, valid_times = self.get_points_in_time_window(
+                chart_data_json["data"], [data[0] for data in chart_data_json["data"]]
+            )
+            valid_dates = np.datetime_as_string(valid_times, unit="h").tolist()
+            valid_values = [float(data[1]) for data in points]
+
+            if not valid_values:
+                continue
 
             self.plot_series.append(
                 dict(
                     type="bar",
                     name=series_name,
-                    x=valid_dates,
-                    y=valid_values,
+                    x=self.encode_dates(valid_dates),
+                    y=self.encode_values(valid_values),
                     yaxis="y3",
                     marker_color=(
                         "rgb(25, 25, 255)"
@@ -633,28 +1033,27 @@ class HEFS(base.DataSource):
         return
 
     def get_location_rating_curve(self):
-        print(f"Getting river rating curve data for {self.gauge_location}")
-        location_rating_curve_url = (
-            f"https://www.cnrfc.noaa.gov/data/ratings/{self.gauge_location}_rating.js"
-        )
-        response = requests.get(location_rating_curve_url)
-        flows = [
-            float(flow)
-            for flow in re.findall(r"ratingFlow.push\((.*)\);", response.text)
-        ]
-        stages = [
-            float(stage)
-            for stage in re.findall(r"ratingStage.push\((.*)\);", response.text)
-        ]
+        manifest = get_manifest()
+        missing = manifest.is_missing(self.gauge_location, "rating_curve")
+        if not missing:
+            rating_curve = get_rating_curve(
+                self.gauge_location, client=self.http_client
+            )
+            missing = not len(rating_curve)
+            manifest.record(self.gauge_location, rating_curve=not missing)
+        if missing:
+            raise ValueError(
+                f"{self.gauge_location} has no rating table, so its HEFS forecast can not be converted between flow and stage"  # noqa: E501
+            )
 
-        return [flows, stages]
+        return rating_curve
 
     def get_title(self, charting_data):
         chart_title = re.findall(r"chart2.setTitle\((.*), false\);", charting_data)[0]
         chart_titles = hjson.loads(f"[{chart_title}]")
 
         main_title = chart_titles[0]
-        soup = BeautifulSoup(main_title["text"], "html.parser")
+        soup = bs4.BeautifulSoup(main_title["text"], "html.parser")
         main_title_text = soup.div.contents[0]
 
         sub_title = chart_titles[1]
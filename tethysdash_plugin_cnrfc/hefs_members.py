@@ -0,0 +1,79 @@
+from concurrent.futures import ThreadPoolExecutor
+from .gauges import GAUGE_LOCATION_ARGUMENT
+from .hefs import HEFS, HEFS_FETCH_WORKERS
+from .lazy import lazy_import
+from .utilities import get_proper_name
+
+np = lazy_import("numpy")
+
+
+class HEFSMembers(HEFS):
+    container = "python"
+    version = "0.0.1"
+    name = "cnrfc_hefs_members"
+    visualization_tags = [
+        "cnrfc",
+        "hefs",
+        "streamflow",
+        "ensemble",
+        "members",
+    ]
+    visualization_description = "An interactive chart that depicts every member of the HEFS ensemble streamflow forecast. More information can be found at https://www.cnrfc.noaa.gov/ensembleProduct.php"
+    visualization_args = {
+        "gauge_location": GAUGE_LOCATION_ARGUMENT,
+    }
+    visualization_group = "CNRFC"
+    visualization_label = "HEFS Ensemble Members"
+    visualization_type = "plotly"
+    visualization_attribution = "CNRFC"
+
+    def __init__(self, gauge_location, metadata=None, **kwargs):
+        super(HEFSMembers, self).__init__(
+            gauge_location,
+            include_rain_melt_plot=False,
+            include_ensemble_members=True,
+            metadata=metadata,
+            **kwargs,
+        )
+
+    def get_figure_cache_key(self, issuance_time):
+        return (self.name,) + super(HEFSMembers, self).get_figure_cache_key(
+            issuance_time
+        )
+
+    def get_cnrfc_hefs_data(self, hefs_metadata):
+        with ThreadPoolExecutor(max_workers=HEFS_FETCH_WORKERS) as executor:
+            rating_curve_future = executor.submit(self.get_location_rating_curve)
+            ensembles_future = executor.submit(
+                self.get_ensembles, hefs_metadata["issuance_time"]
+            )
+
+            rating_curve = rating_curve_future.result()
+            unit, dates, ensembles = ensembles_future.result()
+
+        self.get_ensemble_member_series(rating_curve, unit, dates, ensembles)
+
+        # the rating curve is monotonic, so the range of the converted members is
+        # the converted range of the members
+        window = ensembles if len(dates) <= 240 else ensembles[:239]
+        stage_range = np.array([np.nanmin(window), np.nanmax(window)])
+        if unit == "cfs":
+            stage_range = rating_curve.stage_from_flow(stage_range)
+        self.range_ymin, self.range_ymax = stage_range
+        self.range_xmin = dates[0]
+        self.range_xmax = dates[-1] if len(dates) <= 240 else dates[239]
+
+        location_proper_name = get_proper_name(self.gauge_location)
+        self.title = f"HEFS Ensemble Members<br>{location_proper_name}<br><b>Issuance Time</b>: {hefs_metadata['issuance_time']}"  # noqa: E501
+
+        return
+
+    def get_layout(self):
+        super(HEFSMembers, self).get_layout()
+        self.layout["showlegend"] = False
+        # the members are the whole chart here, so they are shown rather than
+        # hidden behind the legend
+        for series in self.plot_series:
+            series.pop("visible", None)
+
+        return
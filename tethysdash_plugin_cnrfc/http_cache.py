@@ -0,0 +1,170 @@
+import hashlib
+import json
+import os
+import threading
+from .lazy import lazy_import
+
+requests = lazy_import("requests")
+structures = lazy_import("requests.structures")
+
+# directory for files the plugin keeps between processes, overridable with the
+# TETHYSDASH_CNRFC_CACHE_DIR environment variable
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "tethysdash_plugin_cnrfc")
+
+# bytes of response bodies kept on disk before the least recently used are evicted
+HTTP_CACHE_MAX_SIZE = 256 * 1024 * 1024
+
+
+def get_cache_dir():
+    cache_dir = os.environ.get("TETHYSDASH_CNRFC_CACHE_DIR", CACHE_DIR)
+    os.makedirs(cache_dir, exist_ok=True)
+    return cache_dir
+
+
+class HTTPCache:
+    """An on-disk cache of GET responses that carry ETag/Last-Modified validators
+
+    Cached bodies are revalidated with a conditional request and served from disk
+    when the server answers 304. Once the stored bodies exceed max_size the least
+    recently used responses are evicted.
+    """
+
+    def __init__(self, directory=None, max_size=HTTP_CACHE_MAX_SIZE):
+        self.directory = directory or os.path.join(get_cache_dir(), "http")
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+        if not os.access(self.directory, os.W_OK):
+            raise PermissionError(f"{self.directory} is not writable")
+
+    def _paths(self, url):
+        key = hashlib.sha256(url.encode()).hexdigest()
+        path = os.path.join(self.directory, key)
+        return f"{path}.json", f"{path}.body"
+
+    def load(self, url):
+        """Return the cached metadata for url, or None if it is not cached"""
+        metadata_path, _ = self._paths(url)
+        try:
+            with open(metadata_path) as metadata_file:
+                return json.load(metadata_file)
+        except (OSError, ValueError):
+            return None
+
+    def conditional_headers(self, metadata):
+        headers = {}
+        if metadata.get("etag"):
+            headers["If-None-Match"] = metadata["etag"]
+        if metadata.get("last_modified"):
+            headers["If-Modified-Since"] = metadata["last_modified"]
+
+        return headers
+
+    def response(self, url, metadata):
+        """Rebuild the cached response for url, or None if the body is missing"""
+        metadata_path, body_path = self._paths(url)
+        try:
+            with open(body_path, "rb") as body_file:
+                body = body_file.read()
+            os.utime(metadata_path)
+        except OSError:
+            return None
+
+        response = requests.Response()
+        response.status_code = 200
+        response.url = url
+        response.headers = structures.CaseInsensitiveDict(metadata["headers"])
+        response.encoding = metadata["encoding"]
+        response._content = body
+        with self.lock:
+            self.hits += 1
+
+        return response
+
+    def store(self, url, response):
+        """Save a response if it can be revalidated later"""
+        with self.lock:
+            self.misses += 1
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if not response.ok or not (etag or last_modified):
+            return
+
+        metadata = {
+            "url": url,
+            "etag": etag,
+            "last_modified": last_modified,
+            "encoding": response.encoding,
+            "headers": dict(response.headers),
+        }
+        metadata_path, body_path = self._paths(url)
+        suffix = f".{os.getpid()}.{threading.get_ident()}"
+        try:
+            with open(body_path + suffix, "wb") as body_file:
+                body_file.write(response.content)
+            with open(metadata_path + suffix, "w") as metadata_file:
+                json.dump(metadata, metadata_file)
+            os.replace(body_path + suffix, body_path)
+            os.replace(metadata_path + suffix, metadata_path)
+        except OSError as e:
+            print(f"Unable to cache {url}: {e}")
+            return
+
+        self.evict()
+
+    def evict(self):
+        entries = []
+        total_size = 0
+        with os.scandir(self.directory) as directory:
+            for entry in directory:
+                if not entry.name.endswith(".body"):
+                    continue
+                metadata_path = entry.path[: -len(".body")] + ".json"
+                try:
+                    size = entry.stat().st_size
+                    last_used = os.stat(metadata_path).st_mtime
+                except OSError:
+                    continue
+                entries.append((last_used, size, metadata_path, entry.path))
+                total_size += size
+
+        entries.sort()
+        while total_size > self.max_size and entries:
+            _, size, metadata_path, body_path = entries.pop(0)
+            for path in (metadata_path, body_path):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            total_size -= size
+
+    def purge(self, url=None):
+        """Remove url from the cache, or every cached response if url is None"""
+        if url is not None:
+            paths = self._paths(url)
+        else:
+            paths = [
+                os.path.join(self.directory, name)
+                for name in os.listdir(self.directory)
+                if name.endswith((".json", ".body"))
+            ]
+        for path in paths:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def stats(self):
+        with self.lock:
+            return {"hits": self.hits, "misses": self.misses}
+
+
+def get_default_cache():
+    """Return an HTTPCache in the cache directory, or None if it can not be written"""
+    try:
+        return HTTPCache()
+    except OSError as e:
+        print(f"Unable to use the HTTP cache, responses will not be cached: {e}")
+        return None
@@ -0,0 +1,119 @@
+import threading
+from .http_cache import get_default_cache
+from .lazy import lazy_import
+
+requests = lazy_import("requests")
+adapters = lazy_import("requests.adapters")
+retry = lazy_import("urllib3.util.retry")
+
+CONNECT_TIMEOUT = 5
+READ_TIMEOUT = 30
+RETRIES = 3
+RETRY_BACKOFF_FACTOR = 0.5
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+MAX_HOSTS = 4
+MAX_CONNECTIONS = 10
+
+
+class HTTPClient:
+    """A pooled HTTP session shared by the plugin drivers
+
+    Connections are kept alive and pooled per host, every request gets a connect
+    and read timeout, and idempotent requests that fail to connect or come back
+    with a transient status are retried with an exponential backoff. A requests
+    transport adapter can be passed in to replace the network entirely, and GET
+    responses go through the given HTTPCache unless cache=False is passed.
+    """
+
+    def __init__(
+        self,
+        connect_timeout=CONNECT_TIMEOUT,
+        read_timeout=READ_TIMEOUT,
+        retries=RETRIES,
+        backoff_factor=RETRY_BACKOFF_FACTOR,
+        max_connections=MAX_CONNECTIONS,
+        transport=None,
+        cache=None,
+    ):
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_connections = max_connections
+        self.cache = cache
+        if transport is None:
+            transport = adapters.HTTPAdapter(
+                pool_connections=MAX_HOSTS,
+                pool_maxsize=max_connections,
+                max_retries=retry.Retry(
+                    total=retries,
+                    backoff_factor=backoff_factor,
+                    status_forcelist=RETRY_STATUSES,
+                    allowed_methods=("GET", "HEAD"),
+                    raise_on_status=False,
+                ),
+            )
+        self.session = requests.Session()
+        self.session.mount("https://", transport)
+        self.session.mount("http://", transport)
+
+    def get(self, url, cache=True, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        headers = dict(kwargs.pop("headers", None) or {})
+        conditional = "If-None-Match" in headers or "If-Modified-Since" in headers
+        if self.cache is None or not cache or conditional or kwargs.get("stream"):
+            return self.session.get(url, headers=headers, **kwargs)
+
+        metadata = self.cache.load(url)
+        if metadata:
+            headers.update(self.cache.conditional_headers(metadata))
+        response = self.session.get(url, headers=headers, **kwargs)
+        if metadata and response.status_code == 304:
+            cached_response = self.cache.response(url, metadata)
+            if cached_response is not None:
+                return cached_response
+            response = self.session.get(url, **kwargs)
+
+        self.cache.store(url, response)
+
+        return response
+
+    def head(self, url, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        return self.session.head(url, **kwargs)
+
+    def close(self):
+        self.session.close()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client(client=None):
+    """Return client if given, otherwise the process wide HTTPClient"""
+    global _client
+    if client is not None:
+        return client
+
+    with _client_lock:
+        if _client is None:
+            _client = HTTPClient(cache=get_default_cache())
+        return _client
+
+
+def set_client(client):
+    """Replace the process wide HTTPClient, returning the previous one"""
+    global _client
+    with _client_lock:
+        previous, _client = _client, client
+
+    return previous
+
+
+def configure(**kwargs):
+    """Replace the process wide HTTPClient with one built from kwargs
+
+    The new client gets a default HTTPCache unless a cache (or None) is given, or
+    none if the cache directory can not be written.
+    """
+    if "cache" not in kwargs:
+        kwargs["cache"] = get_default_cache()
+    set_client(HTTPClient(**kwargs))
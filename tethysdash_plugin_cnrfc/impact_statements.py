@@ -1,5 +1,5 @@
 from intake.source import base
-from .constants import CNRFCGauges
+from .gauges import GAUGE_LOCATION_ARGUMENT, get_gauge_index
 from .utilities import get_nwps_location_metadata
 
 
@@ -15,22 +15,26 @@ class ImpactStatements(base.DataSource):
     ]
     visualization_description = "A table that shows stage and the impact that stage will have on the surrounding area."
     visualization_args = {
-        "gauge_location": CNRFCGauges,
+        "gauge_location": GAUGE_LOCATION_ARGUMENT,
     }
     visualization_group = "CNRFC"
     visualization_label = "Impact Statements"
     visualization_type = "table"
     visualization_attribution = "CNRFC"
+    # the HTTPClient used for upstream requests, None uses the shared client
+    http_client = None
 
     def __init__(self, gauge_location, metadata=None):
         # store important kwargs
-        self.gauge_location = gauge_location
+        self.gauge_location = get_gauge_index().check(gauge_location)
         super(ImpactStatements, self).__init__(metadata=metadata)
 
     def read(self):
         """Return a version of the xarray with all the data in memory"""
 
-        metadata = get_nwps_location_metadata(self.gauge_location)
+        metadata = get_nwps_location_metadata(
+            self.gauge_location, self.http_client
+        )
         impact_statements = metadata["flood"].get("impacts", [{}])
         title = f"{self.gauge_location} Impact Statements"
 
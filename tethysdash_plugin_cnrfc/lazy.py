@@ -0,0 +1,31 @@
+import importlib
+
+
+class LazyModule:
+    """Stands in for a module until one of its attributes is first used
+
+    Intake imports every driver module to list the catalog, so the heavy libraries
+    only some drivers read with are bound through lazy_import and imported on first
+    use. The module's attributes are then copied onto the stand-in, so later
+    lookups cost the same as on the module itself.
+    """
+
+    def __init__(self, name):
+        self.__dict__["_lazy_name"] = name
+
+    def __getattr__(self, attribute):
+        module = importlib.import_module(self._lazy_name)
+        self.__dict__.update(module.__dict__)
+        # attributes a module only makes on request, such as numpy's submodules
+        value = getattr(module, attribute)
+        self.__dict__[attribute] = value
+
+        return value
+
+    def __repr__(self):
+        return f"<lazy module {self._lazy_name!r}>"
+
+
+def lazy_import(name):
+    """Return a stand-in for the module name that imports it on first use"""
+    return LazyModule(name)
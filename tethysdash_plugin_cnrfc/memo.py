@@ -0,0 +1,89 @@
+import threading
+import time
+from collections import OrderedDict
+
+# bytes of finished figures kept in memory before the least recently used are evicted
+FIGURE_CACHE_MAX_BYTES = 64 * 1024 * 1024
+# seconds a finished figure is served for. Figures are keyed on the HEFS issuance
+# time, but the observed and deterministic series they hold update hourly or faster
+FIGURE_CACHE_MAX_AGE = 15 * 60
+# bytes of parsed HEFS ensemble matrices kept in memory
+ENSEMBLE_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+
+def estimate_size(value):
+    """Approximate the serialized length of a json-like value
+
+    Lists are assumed to hold items like their first, so a figure is sized from the
+    lengths of its arrays without walking every point.
+    """
+    if isinstance(value, str):
+        return len(value) + 2
+    if isinstance(value, dict):
+        return sum(len(key) + 4 + estimate_size(item) for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        if not value:
+            return 2
+        return len(value) * (estimate_size(value[0]) + 1)
+
+    return 8
+
+
+def estimate_ensembles_size(value):
+    """Approximate the memory held by a (unit, dates, matrix) HEFS ensemble"""
+    _, dates, matrix = value
+    return matrix.nbytes + sum(len(date) for date in dates)
+
+
+class LRUCache:
+    """A thread safe least recently used cache bounded by a byte budget
+
+    Values are shared between callers and should not be mutated once cached. With
+    max_age, entries older than max_age seconds are dropped instead of returned.
+    """
+
+    def __init__(self, max_bytes, sizeof=estimate_size, max_age=None):
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.max_age = max_age
+        self.size = 0
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self.lock:
+            if key not in self.entries:
+                return default
+            value, size, stored = self.entries[key]
+            if self.max_age is not None and time.monotonic() - stored > self.max_age:
+                del self.entries[key]
+                self.size -= size
+                return default
+            self.entries.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        size = self.sizeof(value)
+        if size > self.max_bytes:
+            return
+
+        with self.lock:
+            if key in self.entries:
+                self.size -= self.entries.pop(key)[1]
+            self.entries[key] = (value, size, time.monotonic())
+            self.size += size
+            while self.size > self.max_bytes:
+                _, (_, evicted_size, _) = self.entries.popitem(last=False)
+                self.size -= evicted_size
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+
+figure_cache = LRUCache(FIGURE_CACHE_MAX_BYTES, max_age=FIGURE_CACHE_MAX_AGE)
+ensemble_cache = LRUCache(ENSEMBLE_CACHE_MAX_BYTES, sizeof=estimate_ensembles_size)
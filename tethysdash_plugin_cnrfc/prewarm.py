@@ -0,0 +1,188 @@
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from .gauges import get_gauge_index
+from .hefs import HEFS, get_batch_workers
+from .memo import FIGURE_CACHE_MAX_BYTES, estimate_size, figure_cache
+from .utilities import get_nwps_location_metadata
+
+# seconds between checks of the HEFS issuance times
+PREWARM_POLL_INTERVAL = 5 * 60
+# up to this many seconds are added to every wait so that several server processes
+# do not all poll at the same moment
+PREWARM_JITTER = 30
+# the HEFS driver arguments figures are prepared for by default
+PREWARM_HEFS_ARGUMENTS = (
+    {"include_rain_melt_plot": False},
+    {"include_rain_melt_plot": True},
+)
+# gauge_locations value that prewarms every CNRFC gauge
+PREWARM_ALL_GAUGES = "all"
+# bytes of figures kept warm each poll, half of the figure cache so that prewarming
+# does not push out the figures viewers asked for
+PREWARM_MAX_BYTES = FIGURE_CACHE_MAX_BYTES // 2
+
+
+class HEFSPrewarmer:
+    """Rebuilds cached HEFS figures in the background whenever a forecast is issued
+
+    gauge_locations takes gauge ids and basin group labels, or PREWARM_ALL_GAUGES
+    for every CNRFC gauge. Every poll reads the issuance time of each gauge, the same
+    cheap lookup HEFS.read starts with, and builds the figure for each of
+    hefs_arguments that is not in the figure cache for that issuance, whether because
+    the forecast is new or because the figure expired or was evicted. Gauges with new
+    figures also have their NWPS metadata fetched into the HTTP cache. No more than
+    max_workers gauges are worked on at the same time, by default as many as
+    get_batch_workers fits in the shared client's connection pool.
+
+    Each poll keeps about max_bytes of figures warm, going by the estimated size of
+    the figures it finds or builds, and skips the gauges after that. The figure cache
+    is grown to twice max_bytes when it is smaller, leaving the other half for the
+    figures viewers ask for.
+    """
+
+    def __init__(
+        self,
+        gauge_locations,
+        poll_interval=PREWARM_POLL_INTERVAL,
+        jitter=PREWARM_JITTER,
+        max_workers=None,
+        hefs_arguments=PREWARM_HEFS_ARGUMENTS,
+        max_bytes=PREWARM_MAX_BYTES,
+    ):
+        gauge_index = get_gauge_index()
+        if gauge_locations == PREWARM_ALL_GAUGES:
+            gauge_locations = gauge_index.gauges
+        self.gauge_locations = gauge_index.expand(gauge_locations)
+        if not self.gauge_locations:
+            raise ValueError("The gauges to prewarm HEFS figures for must be listed")
+        self.hefs_arguments = [dict(arguments) for arguments in hefs_arguments]
+        self.max_bytes = max_bytes
+        figure_cache.max_bytes = max(figure_cache.max_bytes, 2 * max_bytes)
+        self.warm_bytes = 0
+        self.poll_interval = poll_interval
+        self.jitter = jitter
+        self.max_workers = max_workers
+        self.lock = threading.Lock()
+        self.stopping = threading.Event()
+        self.thread = None
+
+    def start(self):
+        """Start polling in a daemon thread, unless it is already running"""
+        with self.lock:
+            if self.thread and self.thread.is_alive():
+                return False
+            self.stopping.clear()
+            self.thread = threading.Thread(
+                target=self.run, name="cnrfc-hefs-prewarm", daemon=True
+            )
+            self.thread.start()
+
+        return True
+
+    def stop(self, timeout=None):
+        """Stop polling, waiting up to timeout seconds for the current poll"""
+        with self.lock:
+            thread = self.thread
+            self.stopping.set()
+        if thread and thread is not threading.current_thread():
+            thread.join(timeout)
+
+    def is_running(self):
+        with self.lock:
+            return bool(self.thread and self.thread.is_alive())
+
+    def run(self):
+        while not self.stopping.is_set():
+            self.poll()
+            wait = self.poll_interval + random.uniform(0, self.jitter)
+            self.stopping.wait(wait)
+
+    def poll(self):
+        """Check every gauge once, returning the gauges that were prewarmed"""
+
+        def check(gauge_location):
+            if self.stopping.is_set():
+                return False
+            try:
+                return self.check(gauge_location)
+            except Exception as e:
+                print(f"Unable to prewarm HEFS data for {gauge_location}: {e}")
+                return False
+
+        with self.lock:
+            self.warm_bytes = 0
+        max_workers = self.max_workers or get_batch_workers()
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            warmed = list(executor.map(check, self.gauge_locations))
+        if self.warm_bytes >= self.max_bytes:
+            print(
+                f"Prewarmed HEFS figures reached {self.max_bytes} bytes, the remaining gauges were skipped"  # noqa: E501
+            )
+
+        return [
+            gauge_location
+            for gauge_location, was_warmed in zip(self.gauge_locations, warmed)
+            if was_warmed
+        ]
+
+    def check(self, gauge_location):
+        source = HEFS(gauge_location, False)
+        hefs_metadata = source.get_hefs_metadata(source.fetch_hefs_page())
+        issuance_time = hefs_metadata["issuance_time"]
+        # the figure cache itself records what is warm, so figures that expired or
+        # were evicted since the last poll are built again
+        warm_bytes = 0
+        cold_sources = []
+        for arguments in self.hefs_arguments:
+            source = HEFS(gauge_location, **arguments)
+            figure = figure_cache.get(source.get_figure_cache_key(issuance_time))
+            if figure is None:
+                cold_sources.append(source)
+            else:
+                warm_bytes += estimate_size(figure)
+        if not self.reserve(warm_bytes):
+            return False
+        if not cold_sources:
+            return False
+
+        print(f"Prewarming HEFS data for {gauge_location} ({issuance_time})")
+        for source in cold_sources:
+            self.reserve(estimate_size(source.read()), force=True)
+        get_nwps_location_metadata(gauge_location)
+
+        return True
+
+    def reserve(self, size, force=False):
+        """Count size bytes as warm this poll, unless the budget is already spent"""
+        with self.lock:
+            if self.warm_bytes >= self.max_bytes and not force:
+                return False
+            self.warm_bytes += size
+
+        return True
+
+
+_prewarmer = None
+_prewarmer_lock = threading.Lock()
+
+
+def start_prewarming(gauge_locations, **kwargs):
+    """Start the process wide HEFSPrewarmer, built from the arguments the first time"""
+    global _prewarmer
+    with _prewarmer_lock:
+        if _prewarmer is None:
+            _prewarmer = HEFSPrewarmer(gauge_locations, **kwargs)
+        prewarmer = _prewarmer
+    prewarmer.start()
+
+    return prewarmer
+
+
+def stop_prewarming(timeout=None):
+    """Stop the process wide HEFSPrewarmer, if one was started"""
+    global _prewarmer
+    with _prewarmer_lock:
+        prewarmer, _prewarmer = _prewarmer, None
+    if prewarmer is not None:
+        prewarmer.stop(timeout)
@@ -0,0 +1,132 @@
+import re
+import threading
+import time
+from .http_client import get_client
+from .lazy import lazy_import
+from .utilities import interpolate_rating_table, log10_nonzero
+
+np = lazy_import("numpy")
+requests = lazy_import("requests")
+
+RATING_CURVE_URL = "https://www.cnrfc.noaa.gov/data/ratings/{gauge}_rating.js"
+
+# rating tables only change a few times a year, so a cached curve is trusted for
+# this many seconds before it is revalidated against the server
+RATING_CURVE_TTL = 6 * 60 * 60
+
+_flow_pattern = re.compile(r"ratingFlow.push\((.*)\);")
+_stage_pattern = re.compile(r"ratingStage.push\((.*)\);")
+
+
+class RatingCurve:
+    """A gauge rating table prepared for repeated stage/flow interpolation"""
+
+    def __init__(self, stages, flows):
+        self.stages = np.ascontiguousarray(stages, dtype=np.float64)
+        self.flows = np.ascontiguousarray(flows, dtype=np.float64)
+        self.log_stages = log10_nonzero(self.stages)
+        self.log_flows = log10_nonzero(self.flows)
+        self.stages_monotonic = bool(np.all(np.diff(self.stages) >= 0))
+        self.flows_monotonic = bool(np.all(np.diff(self.flows) >= 0))
+
+    @classmethod
+    def from_js(cls, text):
+        flows = [float(flow) for flow in _flow_pattern.findall(text)]
+        stages = [float(stage) for stage in _stage_pattern.findall(text)]
+        return cls(stages, flows)
+
+    @property
+    def monotonic(self):
+        return self.stages_monotonic and self.flows_monotonic
+
+    def __len__(self):
+        return len(self.stages)
+
+    def stage_from_flow(self, flows):
+        return interpolate_rating_table(
+            self.flows,
+            self.stages,
+            self.log_flows,
+            self.log_stages,
+            flows,
+            reverse_above=True,
+            monotonic=self.flows_monotonic,
+        )
+
+    def flow_from_stage(self, stages):
+        return interpolate_rating_table(
+            self.stages,
+            self.flows,
+            self.log_stages,
+            self.log_flows,
+            stages,
+            reverse_above=False,
+            monotonic=self.stages_monotonic,
+        )
+
+
+class _CachedRatingCurve:
+    def __init__(self, curve, etag, last_modified):
+        self.curve = curve
+        self.etag = etag
+        self.last_modified = last_modified
+        self.checked = time.monotonic()
+
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def get_rating_curve(gauge_location, ttl=None, client=None):
+    """Return the RatingCurve for a gauge, downloading it only when needed
+
+    Curves are shared across the process. Once a curve is older than the ttl the
+    server is asked whether the table changed using the ETag/Last-Modified headers
+    of the cached copy, and the table is only downloaded and parsed again if it did.
+    """
+    ttl = RATING_CURVE_TTL if ttl is None else ttl
+    with _cache_lock:
+        cached = _cache.get(gauge_location)
+    if cached and time.monotonic() - cached.checked < ttl:
+        return cached.curve
+
+    headers = {}
+    if cached and cached.etag:
+        headers["If-None-Match"] = cached.etag
+    if cached and cached.last_modified:
+        headers["If-Modified-Since"] = cached.last_modified
+
+    print(f"Getting river rating curve data for {gauge_location}")
+    try:
+        response = get_client(client).get(
+            RATING_CURVE_URL.format(gauge=gauge_location), headers=headers
+        )
+    except requests.RequestException:
+        if cached:
+            return cached.curve
+        raise
+
+    if cached and response.status_code == 304:
+        cached.checked = time.monotonic()
+        return cached.curve
+
+    if cached and not response.ok:
+        return cached.curve
+
+    curve = RatingCurve.from_js(response.text)
+    if response.ok and len(curve):
+        if not curve.monotonic:
+            print(f"--> Rating curve for {gauge_location} is not monotonic")
+        with _cache_lock:
+            _cache[gauge_location] = _CachedRatingCurve(
+                curve,
+                response.headers.get("ETag"),
+                response.headers.get("Last-Modified"),
+            )
+
+    return curve
+
+
+def clear_rating_curve_cache():
+    with _cache_lock:
+        _cache.clear()
@@ -0,0 +1,211 @@
+import json
+import re
+from .lazy import lazy_import
+
+hjson = lazy_import("hjson")
+
+# the Highcharts calls on the graphicalRVF page whose arguments the plots are built
+# from, by the name their payloads are collected under
+RVF_CALLS = {
+    "chart.addSeries": "series",
+    "chart.yAxis[0].addPlotLine": "thresholds",
+    "chart2.addSeries": "forcing",
+}
+# characters of a line searched for a series head before it is parsed whole
+RVF_HEAD_MAX_LENGTH = 4096
+# characters of a series line left unparsed before it is parsed whole instead
+RVF_TAIL_MAX_LENGTH = 256 * 1024
+
+# series calls end in a redraw flag of false, which is left out of their payload
+_call_pattern = re.compile(
+    r"(chart\.addSeries|chart2\.addSeries)\((.*),false\);"
+    r"|(chart\.yAxis\[0\]\.addPlotLine)\((.*)\);"
+)
+_quoted_pattern = re.compile(r"'[^']*'|\"[^\"]*\"")
+_key_pattern = re.compile(r"([{,]\s*)([A-Za-z_$][\w$]*)(\s*:)")
+# the start of a series line up to its data array, when data is a top level key
+_series_head_pattern = re.compile(
+    r"\s*(chart\.addSeries|chart2\.addSeries)\(\{[^{}\[\]]*?\bdata\s*:\s*\["
+)
+
+
+def scan_rvf_page(page):
+    """Collect the payload of every Highcharts call the HEFS plot uses in one pass
+
+    Returns a dict mapping each RVF_CALLS name to the unparsed payloads of those
+    calls in page order. Series payloads have their trailing redraw flag removed.
+    """
+    payloads = {name: [] for name in RVF_CALLS.values()}
+    for name, payload in _iter_calls(page):
+        payloads[name].append(payload)
+
+    return payloads
+
+
+def iter_rvf_data(chunks, names=None):
+    """Yield (name, parsed payload) for each RVF call while the page downloads
+
+    chunks is any iterable of page text, such as a streamed response, and names
+    limits the calls that are parsed to those RVF_CALLS names.
+    """
+    parser = RVFStreamParser(names)
+    for chunk in chunks:
+        yield from parser.feed(chunk)
+    yield from parser.close()
+
+
+class RVFStreamParser:
+    """Parse the Highcharts calls of a graphicalRVF page as its text arrives
+
+    Every call sits on one line of the page. A series line can hold most of the
+    page, so once the start of its data array has arrived, the points received
+    so far are parsed chunk by chunk rather than waiting for the end of the line.
+    Lines the point by point parse can not handle are parsed whole at the end.
+    """
+
+    def __init__(self, names=None):
+        self.names = set(RVF_CALLS.values()) if names is None else set(names)
+        self.reset()
+
+    def reset(self):
+        self.pieces = []
+        self.head = None
+        self.tail = ""
+        self.points = []
+        self.streaming = None
+
+    def feed(self, chunk):
+        """Add page text, returning the (name, payload) pairs of completed lines"""
+        results = []
+        lines = chunk.split("\n")
+        for line in lines[:-1]:
+            self.extend(line)
+            results.extend(self.finish_line())
+        self.extend(lines[-1])
+
+        return results
+
+    def close(self):
+        return self.finish_line()
+
+    def extend(self, text):
+        self.pieces.append(text)
+        if self.streaming is None:
+            line = "".join(self.pieces)
+            match = _series_head_pattern.match(line)
+            if match and RVF_CALLS[match.group(1)] in self.names:
+                head_end = match.end()
+                self.head, self.tail = line[:head_end], line[head_end:]
+                self.streaming = True
+            elif len(line) > RVF_HEAD_MAX_LENGTH:
+                self.streaming = False
+        elif self.streaming:
+            self.tail += text
+
+        if self.streaming:
+            self.parse_points()
+
+    def parse_points(self):
+        end = _last_point_end(self.tail)
+        if end < 0:
+            return
+        batch = to_json(self.tail[: end + 1])
+        if batch is None:
+            self.streaming = False
+            return
+        try:
+            points = json.loads(f"[{batch}]", parse_float=parse_hjson_float)
+        except ValueError:
+            # not a run of whole points after all, wait for more text unless the
+            # unparsed text keeps growing
+            if len(self.tail) > RVF_TAIL_MAX_LENGTH:
+                self.streaming = False
+            return
+        self.points.extend(points)
+        next_point = end + 2
+        self.tail = self.tail[next_point:]
+
+    def finish_line(self):
+        if self.streaming:
+            line = self.head + self.tail
+        else:
+            line = "".join(self.pieces)
+        streamed_points = self.points if self.streaming else None
+        self.reset()
+
+        results = []
+        for name, payload in _iter_calls(line):
+            if name not in self.names:
+                continue
+            parsed = parse_rvf_payload(payload)
+            if streamed_points is not None:
+                parsed["data"] = streamed_points + parsed["data"]
+                streamed_points = None
+            results.append((name, parsed))
+
+        return results
+
+
+def _iter_calls(text):
+    for series_call, series, plot_line_call, plot_line in _call_pattern.findall(text):
+        if series_call:
+            yield RVF_CALLS[series_call], series
+        else:
+            yield RVF_CALLS[plot_line_call], plot_line
+
+
+def _last_point_end(text):
+    """Return the index of the "}" or "]" closing the last complete point, or -1
+
+    A point is only known to be complete once the start of the next one follows.
+    """
+    end = len(text)
+    while end > 0:
+        end = max(text.rfind("},", 0, end), text.rfind("],", 0, end))
+        if text[end + 2:end + 66].lstrip()[:1] in ("{", "["):
+            return end
+
+    return -1
+
+
+def parse_rvf_payload(payload):
+    """Parse a javascript object literal from the RVF page
+
+    Simple literals, with bare keys and quoted strings that hold no quotes, escapes
+    or key-like text, are rewritten as json and read by the json module. Anything
+    else goes through the much slower hjson parser.
+    """
+    text = to_json(payload)
+    if text is not None:
+        try:
+            return json.loads(text, parse_float=parse_hjson_float)
+        except ValueError:
+            pass
+
+    return hjson.loads(payload)
+
+
+def parse_hjson_float(text):
+    # hjson reads whole numbered decimals such as 19.0 as ints, keep doing the same
+    value = float(text)
+    if value.is_integer() and abs(value) < 1e10:
+        return int(value)
+
+    return value
+
+
+def to_json(payload):
+    """Rewrite a simple javascript object literal as json, None if it is not simple"""
+    for quoted in _quoted_pattern.findall(payload):
+        content = quoted[1:-1]
+        if "\\" in content or "'" in content or '"' in content:
+            return None
+        if _key_pattern.search(content):
+            return None
+
+    # the same few keys repeat for every point of a series, so each distinct key is
+    # quoted with one str.replace rather than a regex substitution per occurrence
+    for prefix, key, suffix in set(_key_pattern.findall(payload)):
+        payload = payload.replace(prefix + key + suffix, f'{prefix}"{key}"{suffix}')
+
+    return payload.replace("'", '"')
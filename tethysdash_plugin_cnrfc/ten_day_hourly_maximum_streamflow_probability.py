@@ -1,5 +1,6 @@
 from intake.source import base
-from .constants import CNRFCGauges, CNRFCEnsembleBaseUrl
+from .constants import CNRFCEnsembleBaseUrl
+from .gauges import GAUGE_LOCATION_ARGUMENT, get_gauge_index
 
 
 class MaximumFlowProbability(base.DataSource):
@@ -17,7 +18,7 @@ class MaximumFlowProbability(base.DataSource):
     ]
     visualization_description = "Depicts the probabilities for the hourly maximum streamflow for the next 10 days. More information can be found at https://www.cnrfc.noaa.gov/ensembleProduct.php"
     visualization_args = {
-        "gauge_location": CNRFCGauges,
+        "gauge_location": GAUGE_LOCATION_ARGUMENT,
     }
     visualization_group = "CNRFC"
     visualization_label = "10-Day Hourly Maximum Streamflow Probability"
@@ -26,7 +27,7 @@ class MaximumFlowProbability(base.DataSource):
 
     def __init__(self, gauge_location, metadata=None):
         # store important kwargs
-        self.gauge_location = gauge_location
+        self.gauge_location = get_gauge_index().check(gauge_location)
         super(MaximumFlowProbability, self).__init__(metadata=metadata)
 
     def read(self):
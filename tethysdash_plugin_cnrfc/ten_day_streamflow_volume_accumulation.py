@@ -1,5 +1,6 @@
 from intake.source import base
-from .constants import CNRFCGauges, CNRFCEnsembleBaseUrl
+from .constants import CNRFCEnsembleBaseUrl
+from .gauges import GAUGE_LOCATION_ARGUMENT, get_gauge_index
 
 
 class StreamflowVolumeAccumulation(base.DataSource):
@@ -16,7 +17,7 @@ class StreamflowVolumeAccumulation(base.DataSource):
     ]
     visualization_description = "Depicts the total streamflow volume accumulation (deterministic and ensembles) for the next 10 days. More information can be found at https://www.cnrfc.noaa.gov/ensembleProduct.php"
     visualization_args = {
-        "gauge_location": CNRFCGauges,
+        "gauge_location": GAUGE_LOCATION_ARGUMENT,
     }
     visualization_group = "CNRFC"
     visualization_label = "10-Day Streamflow Volume Accumulation"
@@ -25,7 +26,7 @@ class StreamflowVolumeAccumulation(base.DataSource):
 
     def __init__(self, gauge_location, metadata=None):
         # store important kwargs
-        self.gauge_location = gauge_location
+        self.gauge_location = get_gauge_index().check(gauge_location)
         super(StreamflowVolumeAccumulation, self).__init__(metadata=metadata)
 
     def read(self):
@@ -1,7 +1,11 @@
-import requests
-from .constants import CNRFCGauges
+import base64
+from .gauges import get_gauge_index
+from .http_client import get_client
+from .lazy import lazy_import
 import math
 
+np = lazy_import("numpy")
+
 
 def set_nonzero(x):
     if x <= 0:
@@ -140,13 +144,223 @@ def interpolate_flow_from_rating_curve(ratingStage, ratingFlow, stage):
     return round(flow, 2)
 
 
-def get_nwps_location_metadata(location):
-    response = requests.get(f"https://api.water.noaa.gov/nwps/v1/gauges/{location}")
+def round_values(values, ndigits=2):
+    """Round an array exactly like the builtin round(value, ndigits) would.
+
+    np.round scales by 10**ndigits before rounding, which misplaces values that sit
+    right next to a half step (e.g. 0.015). The rounding error of that scaling is
+    recovered exactly with a Dekker split so ties are broken on the true value.
+    Magnitudes too large for that split fall back to the builtin.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    scale = float(10**ndigits)
+    with np.errstate(over="ignore", invalid="ignore"):
+        scaled = values * scale
+        high = values * 134217729.0
+        high = high - (high - values)
+        low = values - high
+        error = (high * scale - scaled) + low * scale
+
+        rounded = np.rint(scaled)
+        floor = np.floor(scaled)
+        tie = (scaled - floor == 0.5) & (error != 0)
+        rounded[tie] = floor[tie] + (error[tie] > 0)
+    rounded = rounded / scale
+
+    large = np.abs(scaled) >= 2**52
+    if large.any():
+        rounded[large] = [round(value, ndigits) for value in values[large].tolist()]
+
+    return rounded
+
+
+def log10_nonzero(values):
+    return np.array([math.log10(set_nonzero(value)) for value in values])
+
+
+def interpolate_rating_table(
+    x_table, y_table, log_x, log_y, values, reverse_above, monotonic=None
+):
+    """Interpolate y values for an array of x values along a rating table.
+
+    This is the vectorized form of interpolate_*_from_rating_curve, where x is the
+    known quantity and y the one being looked up. log_x and log_y are the
+    log10_nonzero of the tables and reverse_above mirrors the reversed denominator
+    the stage lookup uses above the top of the table. Branches and rounding match
+    the scalar functions; numpy's log10/pow may differ from math's in the last ulp,
+    which only shows for values within an ulp of a rounding step.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    shape = values.shape
+    values = values.ravel()
+    result = np.full(values.shape, np.nan)
+    if monotonic is None:
+        monotonic = bool(np.all(x_table[1:] >= x_table[:-1]))
+
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        log_values = np.log10(np.where(values <= 0, 0.003, values))
+
+        negative = values < 0
+        below = ~negative & (values < x_table[0])
+        above = ~negative & ~below & (values > x_table[-1])
+        inside = ~negative & ~below & ~above & ~np.isnan(values)
+
+        result[negative] = -9999
+
+        # BELOW
+        denominator = x_table[1] - x_table[0]
+        if denominator == 0:
+            result[below] = 0
+        else:
+            result[below] = y_table[0] + ((y_table[1] - y_table[0]) / denominator) * (
+                values[below] - x_table[0]
+            )
+
+        # ABOVE
+        if reverse_above:
+            denominator = log_x[-2] - log_x[-1]
+        else:
+            denominator = log_x[-1] - log_x[-2]
+        if denominator == 0:
+            result[above] = 0
+        else:
+            result[above] = np.power(
+                10.0,
+                log_y[-2]
+                + ((log_y[-1] - log_y[-2]) / denominator)
+                * (log_values[above] - log_x[-2]),
+            )
+
+        # EQUAL OR INTERPOLATE
+        inside_values = values[inside]
+        if monotonic:
+            index = np.searchsorted(x_table, inside_values, side="left")
+        else:
+            index = np.argmax(x_table[None, :] >= inside_values[:, None], axis=1)
+        equal = x_table[index] == inside_values
+        previous = np.maximum(index - 1, 0)
+        interpolated = np.power(
+            10.0,
+            log_y[previous]
+            + ((log_y[index] - log_y[previous]) / (log_x[index] - log_x[previous]))
+            * (log_values[inside] - log_x[previous]),
+        )
+        result[inside] = np.where(equal, y_table[index], interpolated)
+
+    result[result < 0] = -9999
+
+    return round_values(result).reshape(shape)
+
+
+def interpolate_stages_from_rating_curve(ratingStage, ratingFlow, flows):
+    """Array version of interpolate_stage_from_rating_curve"""
+    ratingStage = np.asarray(ratingStage, dtype=np.float64)
+    ratingFlow = np.asarray(ratingFlow, dtype=np.float64)
+    return interpolate_rating_table(
+        ratingFlow,
+        ratingStage,
+        log10_nonzero(ratingFlow),
+        log10_nonzero(ratingStage),
+        flows,
+        reverse_above=True,
+    )
+
+
+def interpolate_flows_from_rating_curve(ratingStage, ratingFlow, stages):
+    """Array version of interpolate_flow_from_rating_curve"""
+    ratingStage = np.asarray(ratingStage, dtype=np.float64)
+    ratingFlow = np.asarray(ratingFlow, dtype=np.float64)
+    return interpolate_rating_table(
+        ratingStage,
+        ratingFlow,
+        log10_nonzero(ratingStage),
+        log10_nonzero(ratingFlow),
+        stages,
+        reverse_above=False,
+    )
+
+
+def ensemble_statistics(ensembles, percentiles):
+    """Compute percentiles and the mean across the members of an ensemble
+
+    ensembles is a (time, member) matrix. The result is a (time, percentile + 1)
+    matrix holding the requested percentiles (as fractions) followed by the mean.
+    The members are sorted once and the percentiles are linearly interpolated from
+    the order statistics the same way numpy and pandas do. The mean can differ from
+    the pandas one in the last digit, as the members are summed in another order.
+    """
+    ensembles = np.asarray(ensembles, dtype=np.float64)
+    percentiles = np.asarray(percentiles, dtype=np.float64)
+    stats = np.empty((ensembles.shape[0], len(percentiles) + 1))
+    if np.isnan(ensembles).any():
+        stats[:, :-1] = np.nanquantile(ensembles, percentiles, axis=1).T
+        stats[:, -1] = np.nanmean(ensembles, axis=1)
+        return stats
+
+    members = ensembles.shape[1]
+    ordered = np.sort(ensembles, axis=1)
+    positions = (members - 1) * percentiles
+    lower = np.floor(positions).astype(int)
+    upper = np.minimum(lower + 1, members - 1)
+    weights = positions - lower
+    below = ordered[:, lower]
+    above = ordered[:, upper]
+    difference = above - below
+    stats[:, :-1] = np.where(
+        weights >= 0.5,
+        above - difference * (1 - weights),
+        below + difference * weights,
+    )
+    stats[:, -1] = ensembles.mean(axis=1)
+
+    return stats
+
+
+def decimation_indices(lower, upper, max_points, keep=0):
+    """Pick the points of a series that survive min-max decimation
+
+    The series after its first keep points is split into buckets and only the
+    lowest point of lower and the highest point of upper in each bucket are kept,
+    along with the first and last points, so peaks and troughs survive. Several
+    series can share one index set by passing their lower and upper envelopes. The
+    first keep points are always kept and about max_points are kept after them.
+    """
+    lower = np.asarray(lower, dtype=np.float64)
+    upper = np.asarray(upper, dtype=np.float64)
+    size = len(lower)
+    keep = min(max(keep, 0), size)
+    if size - keep <= max_points:
+        return np.arange(size)
+
+    buckets = max((max_points - 2) // 2, 1)
+    bucket_size = -(-(size - keep) // buckets)
+    padding = buckets * bucket_size - (size - keep)
+    # missing values and the padding of the last bucket are never picked
+    lower = np.where(np.isnan(lower[keep:]), np.inf, lower[keep:])
+    upper = np.where(np.isnan(upper[keep:]), -np.inf, upper[keep:])
+    lower = np.concatenate([lower, np.full(padding, np.inf)])
+    upper = np.concatenate([upper, np.full(padding, -np.inf)])
+    offsets = keep + np.arange(buckets) * bucket_size
+    lowest = offsets + lower.reshape(buckets, bucket_size).argmin(axis=1)
+    highest = offsets + upper.reshape(buckets, bucket_size).argmax(axis=1)
+
+    indices = np.concatenate([np.arange(keep), [0], lowest, highest, [size - 1]])
+
+    return np.unique(np.minimum(indices, size - 1))
+
+
+def encode_typed_array(values, dtype):
+    """Encode values as a plotly typed array, e.g. {"dtype": "f4", "bdata": ...}"""
+    buffer = np.ascontiguousarray(values, dtype=np.dtype(dtype).newbyteorder("<"))
+    return {"dtype": dtype, "bdata": base64.b64encode(buffer).decode("ascii")}
+
+
+def get_nwps_location_metadata(location, client=None):
+    response = get_client(client).get(
+        f"https://api.water.noaa.gov/nwps/v1/gauges/{location}"
+    )
     return response.json()
 
 
 def get_proper_name(value):
-    for group in CNRFCGauges:
-        for option in group["options"]:
-            if option["value"] == value:
-                return option["label"]
+    return get_gauge_index().label(value)